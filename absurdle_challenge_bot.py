@@ -3,7 +3,6 @@
 '''
 
 import time
-import random
 import keyboard
 import pyautogui
 from PIL import Image
@@ -142,84 +141,21 @@ def get_word_n(word, word_list):
     word_upper = word.upper()
     return word_list.index(word_upper)
 
-def get_one_guess(remaining, target_word_n, guess_words_ns, possible_answers, matrix):
-    ''' Get one guess that will keep game in progress
-    (target word is still in the remaining list)
-    Done by just randomly trying different guesses
-    '''
-    count= 0
-    while True:
-        count += 1
-        guess = random.choice(guess_words_ns)
-        
-        test_remaining = absurdle_solver.generate_remaining(
-                    remaining, guess, possible_answers, matrix)
-        if target_word_n in test_remaining \
-           and len(test_remaining) < len(remaining) \
-           and guess != target_word_n:
-            break    
-    return guess
-
-def get_one_guess(remaining, target_word_n, guess_words_ns, possible_answers, matrix):
-    ''' Get one guess that will keep game in progress
-    (target word is still in the remaining list)
-    Done by just randomly trying different guesses
-    '''
-    count= 0
-    best_guess = None
-    best_remaining = None
-    while True:
-        count += 1
-        # it has  to be full list, using only remaining words
-        # may result in no solution at all
-        guess = random.choice(guess_words_ns)
-        
-        test_remaining = absurdle_solver.generate_remaining(
-                    remaining, guess, possible_answers, matrix)
-        if target_word_n in test_remaining \
-           and len(test_remaining) < len(remaining) \
-           and guess != target_word_n:
-            
-            # Keep best guess (produce shortest remaining list)
-            if not best_guess:
-                best_guess = guess
-                best_remaining = len(test_remaining)
-            elif len(test_remaining) < best_remaining:
-                best_guess = guess
-                best_remaining = len(test_remaining)
-
-        # Out if we spend too much time and already have something
-        if count > MIN_RANDOM_ATTEMPTS and best_guess:
-            break    
-
-    return best_guess
-
-def get_winning_sequence(target_word_n, puzzle_word_ns,
-                         guess_words_ns, possible_answers, matrix):
+def get_winning_sequence(target_word_n, solutions, solver):
     ''' Given the target word, generate list of guesses,
     that leads to this word [n1, n2, n3, n4, target]
+    Look it up in the precalculated solutions, solve if it is not there
     '''
-    remaining = puzzle_word_ns.copy()
-    winning_seq = []
-    while True:
-        guess = get_one_guess(remaining, target_word_n,
-                                 guess_words_ns, possible_answers, matrix) 
-        winning_seq.append(guess)
-        remaining = absurdle_solver.generate_remaining(
-                    remaining, guess, possible_answers, matrix)
-        if len(remaining) == 1:
-            winning_seq.append(remaining[0])
-            break
-    return winning_seq
-
-def one_game(word, puzzle_words, guessing_words, puzzle_word_ns,
-             guess_words_ns, possible_answers, matrix):
+    if target_word_n in solutions:
+        return solutions[target_word_n]
+    return solver.solve(target_word_n)
+
+def one_game(word, puzzle_words, guessing_words, solutions, solver):
     ''' get the target word, out the squence of words (text)
     '''
     
     target_word_n = get_word_n(word, puzzle_words.word_list)
-    winning_seq_n = get_winning_sequence(target_word_n, puzzle_word_ns,
-                                       guess_words_ns, possible_answers, matrix)
+    winning_seq_n = get_winning_sequence(target_word_n, solutions, solver)
     wining_seq = []
     for word_n in winning_seq_n:
         wining_seq.append(guessing_words.word_list[word_n])
@@ -233,18 +169,27 @@ def main():
 
     # Init all variables
     puzzle_words = wordle.WordList("absurdle-guess.txt")
-    #guessing_words = wordle.WordList("words-guess.txt", "words-all.txt") 
-    guessing_words = wordle.WordList("absurdle-guess.txt") 
+    # Puzzle words go first, so the target's number is the same in both lists
+    if FULL_GUESS_LIST:
+        guessing_words = wordle.WordList("absurdle-guess.txt", "words-all.txt")
+    else:
+        guessing_words = wordle.WordList("absurdle-guess.txt") 
     possible_answers = wordle_tree.generate_all_possible_answers()
     possible_answers = absurdle_solver.sort_possible_answers_by_value(
                                                     possible_answers)
 
     matrix = wordle_tree.get_the_matrix(
-        puzzle_words, guessing_words, possible_answers)
+        puzzle_words, guessing_words, possible_answers, mmap=FULL_GUESS_LIST)
 
     puzzle_word_ns = [n for n in range(len(puzzle_words))]
     guess_words_ns = [n for n in range(len(guessing_words))]
 
+    solver = absurdle_solver.ChallengeSolver(
+        puzzle_word_ns, guess_words_ns, possible_answers, matrix,
+        time_limit=SOLVER_TIME_LIMIT)
+    # Solutions for all targets (solved in advance by absurdle_solver)
+    solutions = absurdle_solver.load_challenge_table(puzzle_words,
+                                                     guessing_words)
 
     im = pyautogui.screenshot()
     #im.save("screen1.png")
@@ -263,8 +208,8 @@ def main():
         print (target_word)
 
         # Game started
-        solution = one_game(target_word, puzzle_words, guessing_words, puzzle_word_ns,
-                 guess_words_ns, possible_answers, matrix)
+        solution = one_game(target_word, puzzle_words, guessing_words,
+                            solutions, solver)
         print (f"Solution: {solution}")
         do_click_solution(solution, click_coords)
         
@@ -275,8 +220,13 @@ def main():
     print(time.time() - t)
 
 
-# Try at least this many times until find the best guess
-MIN_RANDOM_ATTEMPTS = 100
+# Time to look for the shortest solution (seconds),
+# after that the best one found so far is used
+# (only for targets missing from the table of solutions)
+SOLVER_TIME_LIMIT = 0.05
+
+# Guess from all allowed words, not only the puzzle ones
+FULL_GUESS_LIST = False
 
 # How many games to play
 MAX_GAMES = 100
@@ -1,13 +1,32 @@
 ''' Absurdle solver
 Go through top guesses to find shortest solutions (4 guesses) to Absurdle
 (https://qntm.org/files/absurdle/absurdle.html)
+With EXHAUSTIVE = True, goes through all guess paths instead, to find
+all 4-guess solutions and the proof that there are no 3-guess ones.
+With BUILD_TABLE = True, solves all challenge mode targets and saves
+the table absurdle_challenge_bot looks the solutions up in.
 '''
 
 import wordle
 import wordle_tree
 
+import os.path
 import time
+import json
+import hashlib
+from collections import OrderedDict
+from multiprocessing import Pool, shared_memory
+import numpy as np
 
+# Number of matrix cells to count at once in absurdle_answers
+# (bigger is a bit faster, but uses more memory)
+TILE_SIZE = 1 << 22
+
+# Time to solve each target when building the challenge table (seconds)
+TABLE_TIME_LIMIT = 1
+# Version of the challenge table: change it when the table's format
+# or ChallengeSolver changes, so the old tables are not used
+TABLE_VERSION = 2
 
 def answer_weight(answer):
     weight = 0
@@ -36,30 +55,78 @@ def absurdle_answer(remaining_words, guess, possible_answers, matrix):
     and count of remaining words for this answer
     given the remaining list and the guess
     '''
-    answers = {i:0 for i in range(243)}
-    words = {i:[] for i in range(243)}
-    for n in remaining_words:
-        answers[matrix[n][guess]] += 1
-    worst_answer = -1
-    highest_count = -1
-
-    for n, count in answers.items():
-        # This is <, not <= because
-        # answers already sorted by worth, so earlier ones shoudl prevail
-        # in case the count is the same
-        if count >  highest_count:
-            worst_answer = n
-            highest_count = count
-    return worst_answer, highest_count
+    answers = np.bincount(matrix[remaining_words, guess],
+                          minlength=len(possible_answers))
+    # argmax is the first of the largest counts: answers are
+    # already sorted by worth, so earlier ones should prevail
+    # in case the count is the same
+    worst_answer = int(answers.argmax())
+    return worst_answer, int(answers[worst_answer])
+
+def count_answers(remaining_words, guess_list, possible_answers, matrix):
+    ''' Count of remaining words for each answer, for each guess of
+    guess_list. Goes through guess_list in tiles of about TILE_SIZE
+    cells of the matrix, to keep the memory use low for long lists.
+    Yields (slice of guess_list, counts: guesses x answers array)
+    '''
+    n_answers = len(possible_answers)
+    tile_width = max(1, TILE_SIZE // max(1, len(remaining_words)))
+    rows = matrix[remaining_words]
+    for start in range(0, len(guess_list), tile_width):
+        tile_guesses = guess_list[start:start + tile_width]
+        answers = rows[:, tile_guesses].astype(np.int32)
+        # Shift answers of each guess (column) to its own range of numbers,
+        # to count all of them with one bincount
+        answers += np.arange(len(tile_guesses), dtype=np.int32) * n_answers
+        counts = np.bincount(answers.ravel(),
+                             minlength=len(tile_guesses) * n_answers)
+        yield (slice(start, start + len(tile_guesses)),
+               counts.reshape(len(tile_guesses), n_answers))
+
+def absurdle_answers(remaining_words, guess_list, possible_answers, matrix,
+                     with_groups=False):
+    ''' absurdle_answer for all guesses of guess_list at once.
+    Return two arrays: worst answer and count of remaining words for it,
+    for each guess.
+    with_groups=True: also return the third array, number of groups
+    for each guess (same as count_groups)
+    '''
+    guess_list = np.asarray(guess_list)
+    worst_answers = np.zeros(len(guess_list), dtype=np.int64)
+    worst_counts = np.zeros(len(guess_list), dtype=np.int64)
+    groups = np.zeros(len(guess_list), dtype=np.int64)
+    for tile, counts in count_answers(remaining_words, guess_list,
+                                      possible_answers, matrix):
+        # Matrix is made with answers numbered by sort_possible_answers_by_value,
+        # so the number is the answer's rank: argmax picks the first (least worth)
+        # of the equally large groups, same as absurdle_answer
+        worst_answers[tile] = counts.argmax(axis=1)
+        worst_counts[tile] = counts[np.arange(len(counts)), worst_answers[tile]]
+        if with_groups:
+            groups[tile] = np.count_nonzero(counts, axis=1)
+    if with_groups:
+        return worst_answers, worst_counts, groups
+    return worst_answers, worst_counts
+
+def count_groups(remaining_words, guess_list, possible_answers, matrix):
+    ''' Number of different answers (groups) each guess of guess_list
+    breaks remaining_words into
+    '''
+    guess_list = np.asarray(guess_list)
+    groups = np.zeros(len(guess_list), dtype=np.int64)
+    for tile, counts in count_answers(remaining_words, guess_list,
+                                      possible_answers, matrix):
+        groups[tile] = np.count_nonzero(counts, axis=1)
+    return groups
 
 def find_best_guesses(remaining_words, guess_list, n_guesses, possible_answers, matrix):
     ''' Find the guesses that generate smallest largest group.
     Return n_guesses best options
     '''
     best_guesses = []
-    for guess in guess_list:
-        new_remaining = absurdle_answer(remaining_words, guess,
-                                        possible_answers, matrix)[1]
+    all_remaining = absurdle_answers(remaining_words, guess_list,
+                                     possible_answers, matrix)[1].tolist()
+    for guess, new_remaining in zip(guess_list, all_remaining):
         if best_guesses:
             if new_remaining <  best_guesses[-1][1]:
                 for n, (one_best_guess, one_best_remaining) in enumerate(best_guesses):
@@ -80,18 +147,36 @@ def generate_remaining(remaining, guess, possible_answers, matrix):
         if matrix[word][guess] == answer:
             new_remaining.append(word)
     return new_remaining
+
+def get_remaining(guesses, puzzle_word_ns, possible_answers, matrix, cache):
+    ''' Remaining words after the guesses (tuple of guess numbers).
+    cache keeps them for all paths seen so far: {guesses: remaining},
+    so for a path that extends a known one it is only one more reduction
+    '''
+    if not guesses:
+        return puzzle_word_ns
+    if guesses not in cache:
+        remaining = get_remaining(guesses[:-1], puzzle_word_ns,
+                                  possible_answers, matrix, cache)
+        cache[guesses] = generate_remaining(remaining, guesses[-1],
+                                            possible_answers, matrix)
+    return cache[guesses]
     
 def find_top_paths(prev_paths, branches,
-                   puzzle_word_ns, guess_words_ns, possible_answers, matrix):
+                   puzzle_word_ns, guess_words_ns, possible_answers, matrix,
+                   cache=None):
     ''' Given current paths (guesses so far), come up with the same number of paths
     branching at each one by the factor of branches
+    cache: remaining lists for paths (see get_remaining), pass the same
+    one to the next level to avoid recalculating them
     '''
+    if cache is None:
+        cache = {}
     total_best_guesses = []
     for prev_path in prev_paths:
 
-        remaining = puzzle_word_ns.copy()
-        for prev_guess in prev_path[:-1]:
-            remaining = generate_remaining(remaining, prev_guess, possible_answers, matrix)
+        remaining = get_remaining(tuple(prev_path[:-1]), puzzle_word_ns,
+                                  possible_answers, matrix, cache)
 
         best_guesses = find_best_guesses(remaining, guess_words_ns,
                                      branches, possible_answers, matrix)
@@ -114,53 +199,758 @@ def find_top_paths(prev_paths, branches,
 
     return total_best_guesses
 
-def print_guesses(guesses, guessing_words, puzzle_word_ns, possible_answers, matrix):
+def print_guesses(guesses, guessing_words, puzzle_word_ns, possible_answers, matrix,
+                  cache=None):
     ''' Guesses come as [(guess1, guess2, n_of_remainingwords),...]
     Let's print them nicely, including final answer
     '''
+    if cache is None:
+        cache = {}
     for guess in guesses:
         for nword in guess[:-1]:
             print(guessing_words.word_list[nword], end=" ")
         print(guess[-1], end=" ")
         if guess[-1] == 1:
-            remaining = puzzle_word_ns.copy()
-            for prev_guess in guess[:-1]:
-                remaining = generate_remaining(remaining, prev_guess, possible_answers, matrix)
+            remaining = get_remaining(tuple(guess[:-1]), puzzle_word_ns,
+                                      possible_answers, matrix, cache)
             print(":", guessing_words.word_list[remaining[0]])
         else:
             print ()
             
+def exhaustive_search(n_guesses, puzzle_words, guessing_words,
+                      possible_answers, matrix):
+    ''' Find all solutions of n_guesses guesses (saved in
+    absurdle_solutions.txt) and the proof that there are none shorter
+    (saved in absurdle_proof.json)
+    '''
+    # The proof is about the lists one guess before the last level
+    if n_guesses < 3:
+        raise ValueError(f"Exhaustive search needs at least 3 guesses, not {n_guesses}")
+
+    guess_words_ns = [n for n in range(len(guessing_words))]
+    puzzle_word_ns = [n for n in range(len(puzzle_words))]
+
+    sizes, edges, finals = enumerate_solutions(
+        n_guesses, puzzle_word_ns, guess_words_ns, possible_answers, matrix)
+    count = write_solutions("absurdle_solutions.txt", edges, finals,
+                            puzzle_word_ns, guess_words_ns, guessing_words,
+                            possible_answers, matrix)
+    print(f"{count} solutions of {n_guesses} guesses")
+
+    matrix_filename = wordle_tree.get_filename(
+        puzzle_words, guessing_words, possible_answers)
+    proof = make_proof(sizes, edges, guess_words_ns, matrix_filename)
+    with open("absurdle_proof.json", "w", encoding="utf-8") as fs:
+        json.dump(proof, fs)
+    proof_checks = check_proof(proof, puzzle_word_ns, guess_words_ns,
+                               possible_answers, matrix)
+    print(f"No solutions of {n_guesses - 1} guesses: " +
+          f"{proof['no_solution']}, proof checks: {proof_checks}")
+
+## Exhaustive search: all guess paths of the given length.
+## Paths that lead to the same remaining list are merged, work is done
+## by a pool of processes, sharing the matrix
+
+# Data of the worker process of the exhaustive search (see init_worker)
+worker_data = {}
+
+def state_key(state):
+    ''' Hash of the remaining list (as numpy array),
+    to find paths that lead to the same list
+    '''
+    return hashlib.blake2b(state.tobytes(), digest_size=16).digest()
+
+def share_matrix(matrix):
+    ''' Copy the matrix into shared memory, so worker processes
+    can use it without having their own copies.
+    Return the SharedMemory object (close and unlink it when done)
+    '''
+    shared = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+    shared_matrix = np.ndarray(matrix.shape, dtype=matrix.dtype,
+                               buffer=shared.buf)
+    shared_matrix[:] = matrix
+    return shared
+
+def init_worker(shared_name, shape, dtype, guess_words_ns, possible_answers):
+    ''' Set up worker process: connect to the shared matrix
+    '''
+    shared = shared_memory.SharedMemory(name=shared_name)
+    matrix = np.ndarray(shape, dtype=dtype, buffer=shared.buf)
+    guess_words_ns = np.array(guess_words_ns)
+    worker_data["shared"] = shared
+    worker_data["matrix"] = matrix
+    worker_data["guess_words_ns"] = guess_words_ns
+    worker_data["possible_answers"] = possible_answers
+    # Number of different answers each guess gives on the whole list:
+    # no smaller list can be broken into more groups than that
+    worker_data["max_groups"] = count_groups(
+        np.arange(matrix.shape[0]), guess_words_ns, possible_answers, matrix)
+
+def expand_state(state):
+    ''' Worker function: children_by_guess for the state
+    '''
+    return children_by_guess(state, worker_data["guess_words_ns"],
+                             worker_data["possible_answers"],
+                             worker_data["matrix"])
+
+def children_by_guess(state, guess_words_ns, possible_answers, matrix):
+    ''' Remaining lists after each of the guesses.
+    Return number of the resulting list for each guess, and
+    list of those resulting lists as [(key, list)]
+    (numbered in the order of the first guess that leads to them)
+    '''
+    worst_answers, _ = absurdle_answers(state, guess_words_ns,
+                                        possible_answers, matrix)
+    answers = matrix[np.ix_(state, guess_words_ns)]
+
+    children_ns = np.zeros(len(guess_words_ns), dtype=np.int32)
+    children = {}
+    for i, worst_answer in enumerate(worst_answers):
+        child = state[answers[:, i] == worst_answer]
+        key = state_key(child)
+        if key not in children:
+            children[key] = (len(children), child)
+        children_ns[i] = children[key][0]
+    return children_ns, [(key, child) for key, (_, child) in children.items()]
+
+def solve_state(state):
+    ''' Worker function: guesses that leave only one word
+    after this state. Return list of (guess, word)
+    '''
+    guess_words_ns = worker_data["guess_words_ns"]
+    matrix = worker_data["matrix"]
+    # Only guesses that can break the list into len(state) groups
+    candidates = guess_words_ns[worker_data["max_groups"] >= len(state)]
+    if len(candidates) == 0:
+        return []
+    worst_answers, counts = absurdle_answers(
+        state, candidates, worker_data["possible_answers"], matrix)
+    solutions = []
+    for guess, worst_answer in zip(candidates[counts == 1],
+                                   worst_answers[counts == 1]):
+        word = state[matrix[state, guess] == worst_answer][0]
+        solutions.append((int(guess), int(word)))
+    return solutions
+
+def enumerate_solutions(n_guesses, puzzle_word_ns, guess_words_ns,
+                        possible_answers, matrix, processes=None):
+    ''' Go through all paths of n_guesses - 1 guesses, to find all
+    that leave one word (which is the last, n_guesses-th guess).
+    Return (sizes, edges, finals):
+    sizes[level]: sizes of all different remaining lists after "level" guesses
+    edges[level]: (offsets, children, first_guesses), different lists
+    on the next level that list state_n leads to are
+    children[offsets[state_n]:offsets[state_n + 1]], first_guesses (same
+    place) are the first guess_n that leads to each of them
+    (only different children are kept, not all states x guesses)
+    finals: {number of the list on the last level: [(guess, word)]}
+    '''
+    shared = share_matrix(matrix)
+    pool = Pool(processes, initializer=init_worker,
+                initargs=(shared.name, matrix.shape, matrix.dtype,
+                          guess_words_ns, possible_answers))
+    # Lists larger than this can't be broken down to one word with one guess
+    max_groups = count_groups(np.arange(matrix.shape[0]), guess_words_ns,
+                              possible_answers, matrix).max()
+
+    try:
+        states = [np.array(puzzle_word_ns, dtype=np.uint16)]
+        sizes = [np.array([len(puzzle_word_ns)])]
+        edges = []
+        for level in range(1, n_guesses - 1):
+            last_level = level == n_guesses - 2
+            new_states = []
+            new_sizes = []
+            keys = {}
+            level_offsets = [0]
+            level_children = []
+            level_first_guesses = []
+            results = pool.imap(expand_state, states, chunksize=4)
+            for state_n, (children_ns, children) in enumerate(results):
+                global_ns = np.zeros(len(children), dtype=np.int32)
+                for child_n, (key, child) in enumerate(children):
+                    if key not in keys:
+                        keys[key] = len(new_sizes)
+                        new_sizes.append(len(child))
+                        # On the last level keep only lists that
+                        # can be solved with the next guess
+                        keep = not last_level or len(child) <= max_groups
+                        new_states.append(child if keep else None)
+                    global_ns[child_n] = keys[key]
+                level_children.append(global_ns)
+                # Children are numbered in the order of their first guess
+                level_first_guesses.append(
+                    np.unique(children_ns, return_index=True)[1].astype(np.int32))
+                level_offsets.append(level_offsets[-1] + len(children))
+                # Free the memory as we go
+                states[state_n] = None
+            print(f"Level {level}: {len(new_sizes)} different lists")
+            states = new_states
+            sizes.append(np.array(new_sizes))
+            edges.append((np.array(level_offsets),
+                          np.concatenate(level_children),
+                          np.concatenate(level_first_guesses)))
+
+        # The last guess before the winning one
+        to_solve = [state_n for state_n, state in enumerate(states)
+                    if state is not None]
+        finals = {}
+        results = pool.imap(solve_state, (states[state_n] for state_n in to_solve),
+                            chunksize=64)
+        for state_n, solutions in zip(to_solve, results):
+            if solutions:
+                finals[state_n] = solutions
+    finally:
+        pool.close()
+        pool.join()
+        shared.close()
+        shared.unlink()
+
+    return sizes, edges, finals
+
+def first_paths(edges, level):
+    ''' One path (guesses' numbers) leading to each list on the level
+    (uses the results of enumerate_solutions)
+    '''
+    paths = [()]
+    for offsets, children, first_guesses in edges[:level]:
+        new_paths = {}
+        for state_n, path in enumerate(paths):
+            start, end = offsets[state_n], offsets[state_n + 1]
+            for child, guess_n in zip(children[start:end].tolist(),
+                                      first_guesses[start:end].tolist()):
+                if child not in new_paths:
+                    new_paths[child] = path + (guess_n,)
+        paths = [new_paths[child] for child in range(len(new_paths))]
+    return paths
+
+def follow_path(path, puzzle_word_ns, guess_words_ns, possible_answers, matrix):
+    ''' Remaining list after the path (guess_n's), the same array
+    as enumerate_solutions has for it
+    '''
+    state = np.array(puzzle_word_ns, dtype=np.uint16)
+    for guess_n in path:
+        guess = guess_words_ns[guess_n]
+        worst_answers, _ = absurdle_answers(state, [guess],
+                                            possible_answers, matrix)
+        state = state[matrix[state, guess] == worst_answers[0]]
+    return state
+
+def write_solutions(filename, edges, finals, puzzle_word_ns, guess_words_ns,
+                    guessing_words, possible_answers, matrix):
+    ''' Write all solutions found by enumerate_solutions into the file,
+    one per line: "guess1 guess2 ... word". Return number of solutions
+    '''
+    # For each list that leads to a solution: all (parent list, guess)
+    # that lead to it. Going from the last level up
+    parents = []
+    needed = list(finals)
+    for level in reversed(range(len(edges))):
+        offsets, children, first_guesses = edges[level]
+        entries = np.flatnonzero(np.isin(children, needed))
+        entry_parents = np.searchsorted(offsets, entries, side="right") - 1
+        # Edges only keep the first guess to each child: other guesses
+        # that lead to it are found again from the parent list
+        paths = first_paths(edges, level)
+        level_parents = {}
+        parent_children = {}
+        for entry, parent in zip(entries.tolist(), entry_parents.tolist()):
+            if parent not in parent_children:
+                state = follow_path(paths[parent], puzzle_word_ns,
+                                    guess_words_ns, possible_answers, matrix)
+                parent_children[parent] = children_by_guess(
+                    state, np.array(guess_words_ns), possible_answers, matrix)[0]
+            children_ns = parent_children[parent]
+            for guess_n in np.flatnonzero(
+                    children_ns == children_ns[first_guesses[entry]]).tolist():
+                level_parents.setdefault(int(children[entry]), []) \
+                    .append((parent, guess_n))
+        parents.insert(0, level_parents)
+        needed = list(set(entry_parents.tolist()))
+
+    def all_paths(level, state_n):
+        ''' All paths leading to list state_n on the level
+        '''
+        if level == 0:
+            yield ()
+            return
+        for parent, guess_n in parents[level - 1][state_n]:
+            for path in all_paths(level - 1, parent):
+                yield path + (guess_n,)
+
+    count = 0
+    with open(filename, "w", encoding="utf-8") as fs:
+        for state_n, solutions in finals.items():
+            for path in all_paths(len(edges), state_n):
+                words = [guessing_words.word_list[guess_words_ns[guess_n]]
+                         for guess_n in path]
+                for guess, word in solutions:
+                    fs.write(" ".join(words + [guessing_words.word_list[guess],
+                                               guessing_words.word_list[word]]))
+                    fs.write("\n")
+                    count += 1
+    return count
+
+def make_proof(sizes, edges, guess_words_ns, matrix_filename):
+    ''' Proof that there is no solution shorter than the searched one:
+    for each different list one guess before the last level (and a path
+    to it), the smallest list any next guess leaves. All of them are
+    larger than 1, so the last level has no one-word lists.
+    Can be checked by check_proof.
+    '''
+    level = len(edges) - 1
+    paths = first_paths(edges, level)
+    offsets, children, _ = edges[level]
+    states = []
+    for state_n, (path, size) in enumerate(zip(paths, sizes[level])):
+        state_children = children[offsets[state_n]:offsets[state_n + 1]]
+        states.append({
+            "path": [int(guess_words_ns[guess_n]) for guess_n in path],
+            "size": int(size),
+            "smallest_next": int(sizes[level + 1][state_children].min())})
+    return {"matrix": matrix_filename, "guesses": level + 1,
+            "no_solution": all(state["smallest_next"] > 1 for state in states),
+            "states": states}
+
+def check_proof(proof, puzzle_word_ns, guess_words_ns, possible_answers, matrix):
+    ''' Check the proof made by make_proof, using only
+    generate_remaining and absurdle_answers:
+    all paths of (guesses - 1) guesses lead to one of the lists of the proof,
+    and the smallest list after one more guess is as stated (and not 1).
+    '''
+    states = {}
+    for state in proof["states"]:
+        remaining = list(puzzle_word_ns)
+        for guess in state["path"]:
+            remaining = generate_remaining(remaining, guess,
+                                           possible_answers, matrix)
+        if len(remaining) != state["size"]:
+            return False
+        counts = absurdle_answers(remaining, guess_words_ns,
+                                  possible_answers, matrix)[1]
+        if counts.min() != state["smallest_next"] or counts.min() <= 1:
+            return False
+        states[tuple(remaining)] = state
+
+    # Lists after all possible paths one guess shorter
+    level = {tuple(puzzle_word_ns)}
+    for _ in range(proof["guesses"] - 1):
+        level = {tuple(generate_remaining(list(remaining), guess,
+                                          possible_answers, matrix))
+                 for remaining in level for guess in guess_words_ns}
+    return level == set(states)
+
+## Challenge mode: get to the given target word
+
+class ChallengeSolver:
+    ''' Absurdle challenge mode solver: find the shortest list of guesses
+    that keeps the target word in the remaining list until it is the only
+    one left (then the target itself is the last guess).
+    Starts with the greedy path (the guess that leaves the smallest list
+    on each turn), then looks for a path one guess shorter than the
+    best one so far, until there is none (so the last one is the shortest)
+    or it takes longer than time_limit seconds (keeps the best found,
+    and timed_out is True after solve()).
+    Lists are pruned by the number of groups: one guess breaks a list into
+    no more groups than the largest group count of any guess for it, and
+    a part of a list into no more than the list itself.
+    cache_size: how many lists after 1 guess to keep answers for
+    (each one is a row over the guess list)
+    '''
+
+    def __init__(self, puzzle_word_ns, guess_words_ns, possible_answers,
+                 matrix, time_limit=0.05, cache_size=64):
+        self.puzzle_word_ns = np.array(puzzle_word_ns)
+        self.guess_words_ns = np.array(guess_words_ns)
+        self.possible_answers = possible_answers
+        self.matrix = matrix
+        self.time_limit = time_limit
+        # One guess can break a list into max_groups groups at most,
+        # so lists longer than max_groups**n need more than n guesses
+        self.max_groups = count_groups(self.puzzle_word_ns, self.guess_words_ns,
+                                       possible_answers, matrix).max()
+        # Answers for the list after 0 guesses (always the same one)
+        # and for the lists after 1 guess (the same for all targets,
+        # so the latest cache_size of them are kept between games)
+        self.start_answers = absurdle_answers(
+            self.puzzle_word_ns, self.guess_words_ns, possible_answers, matrix) \
+            + (self.max_groups,)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        # Answers for longer lists, lists that have no solution
+        # (for the current target)
+        self.target_cache = {}
+        self.failed = set()
+        self.deadline = None
+        self.timed_out = False
+
+    def get_answers(self, state, depth):
+        ''' absurdle_answers for all guesses, for the remaining list state,
+        and the largest number of groups a guess breaks it into
+        '''
+        if depth == 0:
+            return self.start_answers
+        key = state_key(state)
+        if depth == 1 and key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if depth > 1 and key in self.target_cache:
+            return self.target_cache[key]
+
+        worst_answers, counts, groups = absurdle_answers(
+            state, self.guess_words_ns, self.possible_answers, self.matrix,
+            with_groups=True)
+        answers = worst_answers, counts, int(groups.max())
+        if depth == 1:
+            self.cache[key] = answers
+            # Drop the least recently used one
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.target_cache[key] = answers
+        return answers
+
+    def get_moves(self, state, target_n, depth, max_size):
+        ''' Guesses that keep target_n in the list and make it shorter,
+        but not longer than max_size. Best (shortest list) first.
+        Return as [(guess, resulting list)]
+        '''
+        worst_answers, counts, _ = self.get_answers(state, depth)
+        good = (self.matrix[target_n, self.guess_words_ns] == worst_answers) \
+            & (counts < len(state)) & (counts <= max_size)
+        guess_ns = np.flatnonzero(good)
+        guess_ns = guess_ns[np.argsort(counts[guess_ns], kind="stable")]
+        for guess_n in guess_ns:
+            guess = self.guess_words_ns[guess_n]
+            new_state = state[self.matrix[state, guess] == worst_answers[guess_n]]
+            yield int(guess), new_state
+
+    def last_guess(self, state, target_n):
+        ''' Guess that breaks state into single words, so that the one
+        Absurdle keeps is target_n (as [guess]), or None if there is none.
+        With all groups of 1 word Absurdle keeps the least worth answer,
+        so answers don't have to be counted: first keep guesses where
+        target's answer is the only least worth one, then check that
+        all answers of those are different.
+        '''
+        answers = self.matrix[np.ix_(state, self.guess_words_ns)]
+        target_answers = self.matrix[target_n, self.guess_words_ns]
+        guess_ns = np.flatnonzero((answers <= target_answers).sum(axis=0) == 1)
+        answers = np.sort(answers[:, guess_ns], axis=0)
+        good = (answers[1:] != answers[:-1]).all(axis=0)
+        guess_ns = guess_ns[good]
+        if len(guess_ns) == 0:
+            return None
+        return [int(self.guess_words_ns[guess_ns[0]])]
+
+    def search(self, state, target_n, guesses_left, depth):
+        ''' Guesses (no more than guesses_left) that leave only target_n
+        in the list, or None if there are none (or time is out)
+        '''
+        if len(state) == 1:
+            return []
+        if guesses_left == 0:
+            return None
+        key = (state_key(state), guesses_left)
+        if key in self.failed:
+            return None
+        if guesses_left == 1:
+            path = self.last_guess(state, target_n)
+            if path is None:
+                self.failed.add(key)
+            return path
+        # Each guess leaves at least 1/max_groups of the list, and the
+        # lists after it can't be broken into more than max_groups groups
+        max_groups = self.get_answers(state, depth)[2]
+        if len(state) > max_groups ** guesses_left:
+            self.failed.add(key)
+            return None
+
+        for guess, new_state in self.get_moves(
+                state, target_n, depth, max_groups ** (guesses_left - 1)):
+            if time.perf_counter() > self.deadline:
+                self.timed_out = True
+                return None
+            path = self.search(new_state, target_n, guesses_left - 1, depth + 1)
+            if path is not None:
+                return [guess] + path
+            if self.timed_out:
+                return None
+
+        self.failed.add(key)
+        return None
+
+    def greedy(self, target_n):
+        ''' Guesses that leave the shortest list on each turn
+        (while keeping target_n)
+        '''
+        state = self.puzzle_word_ns
+        path = []
+        while len(state) > 1:
+            moves = self.get_moves(state, target_n, len(path), len(state))
+            guess, state = next(moves, (None, None))
+            if guess is None:
+                return None
+            path.append(guess)
+        return path
+
+    def solve(self, target_n):
+        ''' List of guesses that leads to target_n (puzzle word's number),
+        ending with the target itself: [n1, n2, n3, target_n]
+        None if there is no way to get there.
+        It is the shortest one, unless timed_out is True afterwards:
+        then it is the shortest found in time_limit.
+        '''
+        self.target_cache = {}
+        self.failed = set()
+        self.timed_out = False
+        self.deadline = time.perf_counter() + self.time_limit
+
+        # Greedy path is the one to beat: only look for shorter ones
+        best_path = self.greedy(target_n)
+        if best_path is None:
+            return None
+
+        while not self.timed_out:
+            path = self.search(self.puzzle_word_ns, target_n,
+                               len(best_path) - 1, 0)
+            if path is None:
+                break
+            best_path = path
+
+        return best_path + [target_n]
+
+## Challenge mode table: solutions for all targets, solved in advance
+
+def get_table_filename(puzzle_words, guessing_words, time_limit):
+    ''' Table's file name: hash of both word lists, time limit
+    and table version, keep last 8 digits
+    '''
+    h = hashlib.new('sha256')
+    h.update(str(puzzle_words.word_list).encode("utf-8"))
+    h.update(str(guessing_words.word_list).encode("utf-8"))
+    h.update(f"{time_limit} {TABLE_VERSION}".encode("utf-8"))
+    hash_str = h.hexdigest()
+    return f"absurdle_table_{hash_str[:8]}.npy"
+
+def init_table_worker(shared_name, shape, dtype, puzzle_word_ns,
+                      guess_words_ns, possible_answers, time_limit):
+    ''' Set up worker process: connect to the shared matrix,
+    make a solver
+    '''
+    shared = shared_memory.SharedMemory(name=shared_name)
+    matrix = np.ndarray(shape, dtype=dtype, buffer=shared.buf)
+    worker_data["shared"] = shared
+    worker_data["solver"] = ChallengeSolver(puzzle_word_ns, guess_words_ns,
+                                            possible_answers, matrix,
+                                            time_limit)
+
+def solve_target(target_n):
+    ''' Worker function: solution for one target,
+    and if the solver ran out of time
+    '''
+    solver = worker_data["solver"]
+    return solver.solve(target_n), solver.timed_out
+
+def build_challenge_table(puzzle_word_ns, guess_words_ns, possible_answers,
+                          matrix, time_limit=1, processes=None):
+    ''' Solve all targets (puzzle words), using a pool of processes.
+    Return the table as int16 array, one line per target:
+    [n1, n2, n3, target, -1, -1], -1 if there is no solution
+    '''
+    shared = share_matrix(matrix)
+    pool = Pool(processes, initializer=init_table_worker,
+                initargs=(shared.name, matrix.shape, matrix.dtype,
+                          puzzle_word_ns, guess_words_ns, possible_answers,
+                          time_limit))
+    try:
+        solutions = []
+        timed_out = 0
+        results = pool.imap(solve_target, puzzle_word_ns, chunksize=8)
+        for count, (solution, target_timed_out) in enumerate(results):
+            solutions.append(solution or [])
+            timed_out += target_timed_out
+            if (count + 1) % 100 == 0:
+                print(f"Solved {count + 1}/{len(puzzle_word_ns)} " +
+                      f"({timed_out} not proven shortest)")
+    finally:
+        pool.close()
+        pool.join()
+        shared.close()
+        shared.unlink()
+
+    table = np.full((len(solutions), max(len(s) for s in solutions)), -1,
+                    dtype=np.int16)
+    for target_n, solution in enumerate(solutions):
+        table[target_n, :len(solution)] = solution
+    return table
+
+def save_challenge_table(puzzle_words, guessing_words, possible_answers,
+                         matrix, time_limit=TABLE_TIME_LIMIT, processes=None):
+    ''' Solve all targets and save the table (takes a while:
+    time_limit seconds for most of the targets)
+    '''
+    filename = get_table_filename(puzzle_words, guessing_words, time_limit)
+    print(f"Solving all challenge targets for {filename}")
+    table = build_challenge_table(
+        list(range(len(puzzle_words))), list(range(len(guessing_words))),
+        possible_answers, matrix, time_limit, processes)
+    np.save(filename, table)
+
+def load_challenge_table(puzzle_words, guessing_words,
+                         time_limit=TABLE_TIME_LIMIT):
+    ''' Load the table saved by save_challenge_table for these word lists,
+    as a dict {target_n: [n1, n2, n3, target_n]}
+    (empty if there is no table, then targets have to be solved online)
+    '''
+    filename = get_table_filename(puzzle_words, guessing_words, time_limit)
+    if not os.path.exists(filename):
+        print(f"No challenge table {filename}, run absurdle_solver " +
+              "with BUILD_TABLE = True to make it")
+        return {}
+    table = np.load(filename)
+    return {target_n: [int(n) for n in line if n >= 0]
+            for target_n, line in enumerate(table) if line[0] >= 0}
+
+## Offline game: play Absurdle without the web page
+
+class Absurdle:
+    ''' One game of Absurdle, with the same rules as absurdle_answer.
+    With target_n it is challenge mode: the game is lost when target_n
+    is no longer among the remaining words, won when it is guessed.
+    Otherwise it is won when the guess gets all greens.
+    '''
+
+    def __init__(self, puzzle_word_ns, possible_answers, matrix, target_n=None):
+        self.remaining = np.array(puzzle_word_ns)
+        self.possible_answers = possible_answers
+        self.matrix = matrix
+        self.target_n = target_n
+        self.all_green = possible_answers[(2, 2, 2, 2, 2)]
+        self.guesses = []
+        self.won = False
+        self.lost = False
+
+    def guess(self, guess_n):
+        ''' Make a guess, return the answer's number
+        (None if the game is already over)
+        '''
+        if self.won or self.lost:
+            return None
+        answer, _ = absurdle_answer(self.remaining, guess_n,
+                                    self.possible_answers, self.matrix)
+        self.guesses.append(guess_n)
+        self.remaining = self.remaining[
+            self.matrix[self.remaining, guess_n] == answer]
+        if answer == self.all_green:
+            # In challenge mode the target is the only way to win
+            # (it could only be a different word if the target is gone)
+            self.won = self.target_n is None or guess_n == self.target_n
+            self.lost = not self.won
+        elif self.target_n is not None and self.target_n not in self.remaining:
+            self.lost = True
+        return answer
+
+def benchmark_challenge(solve, puzzle_word_ns, possible_answers, matrix,
+                        targets=None):
+    ''' Play challenge games for all targets (all puzzle words by default)
+    with solve(target_n) -> [n1, n2, ..., target_n] (ChallengeSolver.solve,
+    solutions from load_challenge_table etc).
+    Return the stats: {"games", "wins", "average_length" (of won games),
+    "average_time", "max_time" (of solve), "games_per_second"}
+    (None if there were no games to average)
+    '''
+    if targets is None:
+        targets = puzzle_word_ns
+    start = time.perf_counter()
+    wins = 0
+    lengths = []
+    times = []
+    for target_n in targets:
+        t = time.perf_counter()
+        sequence = solve(target_n)
+        times.append(time.perf_counter() - t)
+
+        game = Absurdle(puzzle_word_ns, possible_answers, matrix, target_n)
+        for guess_n in sequence or []:
+            game.guess(guess_n)
+        if game.won:
+            wins += 1
+            lengths.append(len(game.guesses))
+
+    total_time = time.perf_counter() - start
+    return {"games": len(targets),
+            "wins": wins,
+            "average_length": sum(lengths) / len(lengths) if lengths else None,
+            "average_time": sum(times) / len(targets) if targets else None,
+            "max_time": max(times, default=None),
+            "games_per_second": len(targets) / total_time if targets else None}
+
 if __name__ == "__main__":
 
     t = time.time()
     
-    puzzle_words = wordle.WordList("words-guess.txt")
-    #guessing_words = wordle.WordList("words-guess.txt", "words-all.txt") 
-    guessing_words = wordle.WordList("words-guess.txt") 
+    # Guess from all allowed words, not only the puzzle ones
+    # (too much for the EXHAUSTIVE mode)
+    FULL_GUESS_LIST = False
+
+    # Solve all challenge targets and save the table for
+    # absurdle_challenge_bot (same FULL_GUESS_LIST as the bot's)
+    BUILD_TABLE = False
+
+    # Challenge mode has its own list of targets
+    puzzle_file = "absurdle-guess.txt" if BUILD_TABLE else "words-guess.txt"
+    puzzle_words = wordle.WordList(puzzle_file)
+    if FULL_GUESS_LIST:
+        guessing_words = wordle.WordList(puzzle_file, "words-all.txt") 
+    else:
+        guessing_words = wordle.WordList(puzzle_file) 
     possible_answers = wordle_tree.generate_all_possible_answers()
     possible_answers = sort_possible_answers_by_value(possible_answers)
 
     matrix = wordle_tree.get_the_matrix(
-        puzzle_words, guessing_words, possible_answers)
+        puzzle_words, guessing_words, possible_answers, mmap=FULL_GUESS_LIST)
 
     guess_words_ns = [n for n in range(len(guessing_words))]
     puzzle_word_ns = [n for n in range(len(puzzle_words))]
 
     TEST_WIDTH = 20
 
-    # Level 1
-    best_guesses_1 = find_best_guesses(puzzle_word_ns, guess_words_ns,
-                                     TEST_WIDTH, possible_answers, matrix)
-    print_guesses(best_guesses_1, guessing_words, puzzle_word_ns, possible_answers, matrix)
+    # Go through all paths instead of TEST_WIDTH best ones
+    EXHAUSTIVE = False
+    # Length of solutions to look for in exhaustive mode
+    SOLUTION_LENGTH = 4
+
+    if BUILD_TABLE:
+        save_challenge_table(puzzle_words, guessing_words, possible_answers,
+                             matrix)
+
+    elif EXHAUSTIVE:
+        exhaustive_search(SOLUTION_LENGTH, puzzle_words, guessing_words,
+                          possible_answers, matrix)
+
+    else:
+        # Remaining lists for all paths, shared by all levels
+        remaining_cache = {}
+
+        # Level 1
+        best_guesses_1 = find_best_guesses(puzzle_word_ns, guess_words_ns,
+                                         TEST_WIDTH, possible_answers, matrix)
+        print_guesses(best_guesses_1, guessing_words, puzzle_word_ns, possible_answers, matrix,
+                      remaining_cache)
     
-    #Level 2
-    best_guesses_2 = find_top_paths(best_guesses_1, TEST_WIDTH,
-                   puzzle_word_ns, guess_words_ns, possible_answers, matrix)
-    print_guesses(best_guesses_2, guessing_words, puzzle_word_ns, possible_answers, matrix)
-
-    #Level 3
-    best_guesses_3 = find_top_paths(best_guesses_2, TEST_WIDTH,
-                   puzzle_word_ns, guess_words_ns, possible_answers, matrix)
-    print_guesses(best_guesses_3, guessing_words, puzzle_word_ns, possible_answers, matrix)
+        #Level 2
+        best_guesses_2 = find_top_paths(best_guesses_1, TEST_WIDTH,
+                       puzzle_word_ns, guess_words_ns, possible_answers, matrix,
+                       remaining_cache)
+        print_guesses(best_guesses_2, guessing_words, puzzle_word_ns, possible_answers, matrix,
+                      remaining_cache)
+
+        #Level 3
+        best_guesses_3 = find_top_paths(best_guesses_2, TEST_WIDTH,
+                       puzzle_word_ns, guess_words_ns, possible_answers, matrix,
+                       remaining_cache)
+        print_guesses(best_guesses_3, guessing_words, puzzle_word_ns, possible_answers, matrix,
+                      remaining_cache)
 
     print(time.time() - t)
@@ -0,0 +1,135 @@
+''' Streaming log of simulated games: each game is written to the file
+as soon as it is finished, so nothing is kept in memory, and the log
+is there even if the simulation is stopped.
+Text log: one game per line, guesses separated by spaces
+(final word is the secret word, if the game was won).
+Binary log: for each game number of guesses (2 bytes), then
+guess numbers (in the list of words) and answer codes.
+Use export_text to turn it into a text log.
+'''
+
+import numbers
+import struct
+
+import numpy as np
+
+import hello_wordle_sim
+
+# Binary log starts with this, then word length and number of words
+MAGIC = b"GLOG"
+HEADER = struct.Struct("<4sBI")
+# Each game starts with the number of guesses in it
+COUNT = struct.Struct("<H")
+
+
+def answer_code(answer):
+    ''' Answer (2, 1, 0, 0, 0) as a number: sum of answer[j] * 3**j
+    (if it is a number already, including numpy ones, it is returned as int)
+    '''
+    if isinstance(answer, numbers.Integral):
+        return int(answer)
+    code = 0
+    for j, color in enumerate(answer):
+        code += color * 3**j
+    return code
+
+def get_dtypes(n_words, word_length):
+    ''' Smallest types to keep word numbers and answer codes
+    '''
+    word_dtype = np.uint16 if n_words <= 2**16 else np.uint32
+    if 3**word_length <= 2**8:
+        code_dtype = np.uint8
+    elif 3**word_length <= 2**16:
+        code_dtype = np.uint16
+    else:
+        code_dtype = np.uint32
+    return np.dtype(word_dtype).newbyteorder("<"), \
+        np.dtype(code_dtype).newbyteorder("<")
+
+
+class GameLog:
+    ''' Log file, add games one by one with add().
+    words: list of all guess words (needed for binary=True,
+    guesses are saved as numbers in it)
+    Use as a context manager, or close() when done.
+    '''
+
+    def __init__(self, filename, words=None, binary=False, word_length=5):
+        self.binary = binary
+        self.games = 0
+        if binary:
+            self.word_ns = {word: n for n, word in enumerate(words)}
+            self.word_dtype, self.code_dtype = get_dtypes(len(words), word_length)
+            self.log_fs = open(filename, "wb")
+            self.log_fs.write(HEADER.pack(MAGIC, word_length, len(words)))
+        else:
+            # Line buffering: every game is written when it is added
+            self.log_fs = open(filename, "w", encoding="utf-8", buffering=1)
+
+    def add(self, guesses):
+        ''' Add one game: list of (word, answer) for all guesses,
+        answer as (2, 1, 0, 0, 0) or its code
+        (binary log: no more than 65535 guesses)
+        '''
+        if self.binary:
+            if len(guesses) > 0xFFFF:
+                raise ValueError(f"Game of {len(guesses)} guesses is too long " +
+                                 "for the binary log")
+            word_ns = np.array([self.word_ns[word] for word, _ in guesses],
+                               dtype=self.word_dtype)
+            codes = np.array([answer_code(answer) for _, answer in guesses],
+                             dtype=self.code_dtype)
+            self.log_fs.write(COUNT.pack(len(guesses)) +
+                              word_ns.tobytes() + codes.tobytes())
+            self.log_fs.flush()
+        else:
+            self.log_fs.write(" ".join(word for word, _ in guesses) + "\n")
+        self.games += 1
+
+    def close(self):
+        ''' Close the file
+        '''
+        self.log_fs.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_log(filename, words):
+    ''' Go through the games of a binary log.
+    words is the same list of words the log was written with.
+    Yields games as lists of (word, answer)
+    '''
+    with open(filename, "rb") as log_fs:
+        magic, word_length, n_words = HEADER.unpack(log_fs.read(HEADER.size))
+        if magic != MAGIC or n_words != len(words):
+            raise ValueError(f"{filename} is not a game log for this word list")
+        word_dtype, code_dtype = get_dtypes(n_words, word_length)
+        # Codes back to the answers: (2, 1, 0, 0, 0)
+        pos_answers = hello_wordle_sim.PossibleAnswers(word_length)
+        while True:
+            count = log_fs.read(COUNT.size)
+            # End of the file (or the game was cut short
+            # when the simulation was stopped while writing)
+            if len(count) < COUNT.size:
+                break
+            count, = COUNT.unpack(count)
+            word_ns = np.frombuffer(log_fs.read(count * word_dtype.itemsize),
+                                    dtype=word_dtype)
+            codes = np.frombuffer(log_fs.read(count * code_dtype.itemsize),
+                                  dtype=code_dtype)
+            # Game cut short (the simulation was stopped while writing)
+            if len(codes) < count:
+                break
+            yield [(words[word_n], pos_answers.decode(code))
+                   for word_n, code in zip(word_ns.tolist(), codes.tolist())]
+
+def export_text(filename, words, text_filename):
+    ''' Write the binary log as a text log (one game per line)
+    '''
+    with GameLog(text_filename) as text_log:
+        for game in read_log(filename, words):
+            text_log.add(game)
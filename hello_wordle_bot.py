@@ -174,7 +174,7 @@ class WordleBot:
                 raise RuntimeError
 
             guess_n, _ = secrets.find_best_guess(guesses, self.data, strength=strength)
-            guess = guesses.words[guess_n]
+            guess = guesses.n2word(guess_n)
             print(f"{turn + 1}. ({len(secrets)} secrets remains). Guess: {guess} ")
             self.type_word(guess)
 
@@ -10,10 +10,14 @@ import hashlib
 import os
 import time  # Only used in main() to time execution
 
+from contextlib import nullcontext
 from dataclasses import dataclass
+from multiprocessing import Pool
 
 import numpy as np
 
+import game_log
+
 
 @dataclass
 class SimulationOptions:
@@ -42,27 +46,36 @@ class SimulationOptions:
     # the game was won.
     logfile_name: str = ""
 
+    # True to write the log in the compact binary format
+    # (guess numbers and answer codes, see game_log)
+    binary_log: bool = False
+
 
 class WordList():
     ''' Class to keep the list of words (either secret or all)
-    Keeps all the words in "words" dict as {n:"word"}
+    All words are in "all_words" list (word number n is all_words[n]),
+    remaining ones are the numbers in the live part of "index" array
     '''
 
     def __init__(self, words_file=None, words_len=5, words_list=None):
         ''' New Words list. Take words of length words_len
         from the file words_file and/or list words_list.
-        Word list stored as {n:"word"},
+        Words are numbered in the order they were added,
         so words could be deleted but we still have their numbers.
+        all_words and reverse never change, so copies share them.
         '''
-        # Main dict to store words data
-        self.words = {}
+        # All words, by their numbers
+        self.all_words = []
         # Dict to speed up searching a number by word
         self.reverse = {}
 
-        # Used in "reduce_by_difficulty". Class variable so it we don't have to
+        # Used in "words_failing_checks". Class variable so it we don't have to
         # calculate it over and over again
         self.max_allowed_letter_count = {}
 
+        # Encoded words (see get_encoded), shared with all copies
+        self.encoded = {}
+
         word_count = 0
         # Add words from the file
         if words_file:
@@ -70,7 +83,7 @@ class WordList():
                 for line in words:
                     word = line.strip()
                     if len(word) == words_len and "*" not in word:
-                        self.words[word_count] = word
+                        self.all_words.append(word)
                         self.reverse[word] = word_count
                         word_count += 1
 
@@ -78,24 +91,43 @@ class WordList():
         if words_list:
             for word in words_list:
                 if len(word) == words_len and "*" not in word:
-                    self.words[word_count] = word
+                    self.all_words.append(word)
                     self.reverse[word] = word_count
                     word_count += 1
 
+        # Remaining word numbers are index[:size],
+        # in the order of their numbers
+        self.index = np.arange(word_count)
+        self.size = word_count
+
+    def as_dict(self):
+        ''' Remaining words as a new dict {n:"word"}
+        (changing it doesn't change the list)
+        '''
+        return {word_n: self.all_words[word_n]
+                for word_n in self.word_numbers().tolist()}
+
+    def word_numbers(self):
+        ''' Numbers of the remaining words (array, don't change it)
+        '''
+        return self.index[:self.size]
+
+    def keep_only(self, keep):
+        ''' Delete words: keep is a bool array for the remaining words
+        (same order as word_numbers). Kept words are moved to the front
+        of index, so the order of the numbers stays the same.
+        '''
+        kept = self.word_numbers()[keep]
+        self.size = len(kept)
+        self.index[:self.size] = kept
+
     def get_distribution(self, guess_n, data):
         ''' Given a number of a guessing word, return list of lengths of
         resulting word lists, if this guess is played.
         data is WData object for lists of secrets and guesses
         '''
-        # This is where we store count of words for each possible answer
-        answers = set()
-
-        # Go through matrix and find all possible results for this guess
-        for secret_n in self.words:
-            answer = data.matrix[secret_n][guess_n]
-            answers.add(answer)
-
-        return len(answers)
+        # All possible results for this guess, in the matrix
+        return len(np.unique(data.matrix[self.word_numbers(), guess_n]))
 
     def find_best_guess(self, guesses, data, strength=100):
         ''' Try "strength" random guesses, and return one
@@ -105,7 +137,7 @@ class WordList():
         '''
         # If there is one word lest - return this word
         if len(self) == 1:
-            only_word = list(self.words.values())[0]
+            only_word = self.n2word(self.index[0])
             return guesses.word2n(only_word), 1
 
         # If the list of possible secret words is small enough:
@@ -114,13 +146,19 @@ class WordList():
         # This part is skipped with strength == -1
         # (as we are going to analyze all possible words anyway)
         if len(self) < strength:
-            for secret_n in self.words:
-                guess_n = guesses.word2n(self.words[secret_n])
-                distribution = self.get_distribution(guess_n, data)
-                # Resulting distribution is exactly as big as the
-                # list of remaining secrets: return that
-                if distribution == len(self):
-                    return guess_n, distribution
+            secret_ns = self.word_numbers()
+            guess_ns = data.secret_guess_ns[secret_ns]
+            # Answers of all remaining secrets to all of them as guesses
+            # (square part of the matrix), distribution of each column
+            # is the number of different values in it
+            answers = np.sort(data.matrix[secret_ns][:, guess_ns].astype(np.int64),
+                              axis=0)
+            distributions = 1 + (answers[1:] != answers[:-1]).sum(axis=0)
+            # Resulting distribution is exactly as big as the
+            # list of remaining secrets: return the first one like that
+            perfect = np.flatnonzero(distributions == len(self))
+            if len(perfect) > 0:
+                return int(guess_ns[perfect[0]]), len(self)
 
         # Now let's check random guesses and return the best
         best_guess = None
@@ -129,7 +167,7 @@ class WordList():
         # Use all words if strength == -1,
         # or random sample if it is an actual number
         if strength == -1:
-            guesses_to_analyze = list(guesses.words.keys())
+            guesses_to_analyze = guesses.word_numbers().tolist()
         else:
             guesses_to_analyze = guesses.sample(strength, use_numbers=True)
 
@@ -147,14 +185,9 @@ class WordList():
         in keeping with these guess and answer.
         Used on the list of remaining secret words.
         '''
-        words_to_delete = []
-        for secret_n in self.words:
-            if data.matrix[secret_n][guess_n] != answer:
-                words_to_delete.append(secret_n)
-        for word_to_delete in words_to_delete:
-            del self.words[word_to_delete]
+        self.keep_only(data.matrix[self.word_numbers(), guess_n] == answer)
 
-    # Following are functions to be used by reduce_by_difficulty
+    # Following are functions to be used by words_failing_checks
     @staticmethod
     def check_green(word, guess, answer):
         ''' Check if "GREEN" condition is fulfilled
@@ -246,16 +279,16 @@ class WordList():
                 return False
         return True
 
-    def reduce_by_difficulty(self, guess, answer, difficulty):
-        ''' Given the guess and answer, filter the list,
-        so it would comply with HARD (difficulty==1) and
-        ULTRA HARD (difficulty==2) rules.
-        Used for the list of guesses - as not all guesses are valid on
-        higher difficulties.
+    def words_failing_checks(self, guess, answer, difficulty):
+        ''' Word numbers of the words that don't comply with HARD
+        (difficulty==1) and ULTRA HARD (difficulty==2) rules after
+        the guess and answer, checked one by one with check_ functions.
+        Slow, reduce_by_difficulty does the same with difficulty_mask,
+        this is kept to verify it (see verify_difficulty_mask)
         '''
-        # Do nothing for NORMAL difficulty level
+        # Nothing to check for NORMAL difficulty level
         if difficulty == 0:
-            return None
+            return []
 
         # List of checks to perform on the words
         # Each one is a function that gets (word, guess, answer)
@@ -276,16 +309,44 @@ class WordList():
 
         # Apply these checks on all the words in the list
         words_to_delete = []
-        for word_n, word_original in self.words.items():
-            word = list(word_original)
+        for word_n in self.word_numbers().tolist():
+            word = list(self.all_words[word_n])
             for check in checks:
                 if not check(word, guess, answer):
                     words_to_delete.append(word_n)
                     break
 
+        return words_to_delete
+
+    def get_encoded(self):
+        ''' All words of the list (including deleted ones) encoded with
+        encode_words, as (chars, counts), row n is the word number n.
+        Calculated once, then shared by all copies of the list.
+        '''
+        if not self.encoded:
+            self.encoded["chars"], self.encoded["counts"] = \
+                encode_words(self.all_words)
+        return self.encoded["chars"], self.encoded["counts"]
+
+    def reduce_by_difficulty(self, guess, answer, difficulty):
+        ''' Given the guess and answer, filter the list,
+        so it would comply with HARD (difficulty==1) and
+        ULTRA HARD (difficulty==2) rules.
+        Used for the list of guesses - as not all guesses are valid on
+        higher difficulties.
+        '''
+        # Do nothing for NORMAL difficulty level
+        if difficulty == 0:
+            return None
+
+        # Check all remaining words at once on the encoded arrays
+        chars, counts = self.get_encoded()
+        word_ns = self.word_numbers()
+        keep = difficulty_mask(chars[word_ns], counts[word_ns],
+                               guess, answer, difficulty)
+
         # Purge those who don't comply
-        for word_to_delete in words_to_delete:
-            del self.words[word_to_delete]
+        self.keep_only(keep)
 
         return None
 
@@ -294,24 +355,28 @@ class WordList():
         if there are fewer left). Can be used to get the words themselves
         (for example one secret word) or their numbers (for example when
         looking for the best guess)
+        Only sample_size positions are picked, not the whole list
         '''
-        # Pick the thing to sample
-        if use_numbers:
-            sample_space = self.words.keys()
-        else:
-            sample_space = self.words.values()
-
         if sample_size >= len(self):
-            return list(sample_space)
+            word_ns = self.word_numbers().tolist()
+        else:
+            word_ns = self.index[random.sample(range(self.size),
+                                               sample_size)].tolist()
 
-        return random.sample(list(sample_space), sample_size)
+        if use_numbers:
+            return word_ns
+        return [self.all_words[word_n] for word_n in word_ns]
 
     def copy(self):
-        ''' Create and return a copy of itself, by copying internal dicts
+        ''' Create and return a copy of itself: index array is copied,
+        words (and their encoded version) are shared
         '''
         the_copy = WordList()
-        the_copy.words = self.words.copy()
-        the_copy.reverse = self.reverse.copy()
+        the_copy.all_words = self.all_words
+        the_copy.reverse = self.reverse
+        the_copy.encoded = self.encoded
+        the_copy.index = self.index.copy()
+        the_copy.size = self.size
         return the_copy
 
     def word2n(self, word):
@@ -319,10 +384,15 @@ class WordList():
         '''
         return self.reverse[word]
 
+    def n2word(self, word_n):
+        ''' Return the word by its index
+        '''
+        return self.all_words[word_n]
+
     def __len__(self):
         ''' Return the length of the word list
         '''
-        return len(self.words)
+        return self.size
 
     def __str__(self):
         ''' String rep: length of the word list, and first and last words
@@ -345,6 +415,35 @@ class WordList():
         return out
 
 
+class PossibleAnswers():
+    ''' Numbers of all possible answers for the word length word_len:
+    {(0,0,0,0,0): 0, (1,0,0,0,0): 1,  ..., (2,2,2,2,2): 242}
+    Works like a (read-only) dictionary, but numbers are calculated
+    on the fly, as there are 3**word_len of them (14M for 15 letters).
+    '''
+
+    def __init__(self, word_len):
+        self.word_len = word_len
+        # Precalculate powers of 3 to 0..word_len
+        self.powers = [3**j for j in range(word_len)]
+
+    def __getitem__(self, answer):
+        ''' Number of the answer (2,1,1,1,0)
+        '''
+        return sum(result * power
+                   for result, power in zip(answer, self.powers))
+
+    def decode(self, answer_n):
+        ''' Answer (2,1,1,1,0) by its number
+        '''
+        return tuple((answer_n // power) % 3 for power in self.powers)
+
+    def __len__(self):
+        ''' There are exactly 3**word_len possible answers
+        '''
+        return 3**self.word_len
+
+
 class WData():
     ''' Class to calculate all necessary data for the solution:
     intersection of guesses and answers, list of answers etc.
@@ -357,26 +456,21 @@ class WData():
         ''' Generate the data. Incoming are two WordList objects
         '''
         # Word length
-        self.word_length = len(secrets.words[0])
+        self.word_length = len(secrets.n2word(0))
         # possible answers and their indexes
         self.pos_answers = self.generate_all_possible_answers(self.word_length)
         self.matrix = self.get_the_matrix(secrets, guesses)
+        # Number of each secret word in guesses
+        self.secret_guess_ns = np.array(
+            [guesses.word2n(word) for word in secrets.all_words], dtype=np.int64)
 
     @staticmethod
     def generate_all_possible_answers(word_len):
-        ''' Generate all possible answers for the word length word_len.
-        Put them in a dictionary like this:
-        {(0,0,0,0,0): 0, (0,0,0,0,1): 1,  ..., (2,2,2,2,2): 242}
+        ''' All possible answers for the word length word_len,
+        as PossibleAnswers (works like a dictionary):
+        {(0,0,0,0,0): 0, (1,0,0,0,0): 1,  ..., (2,2,2,2,2): 242}
         '''
-        out = {}
-        # Precalculate powers of 3 to 0..word_len
-        powers = {j: 3**j for j in range(word_len)}
-
-        # There are exactly 3**word_len possible answers
-        for i in range(3**word_len):
-            answer = tuple((i // powers[j]) % 3 for j in range(word_len))
-            out[answer] = i
-        return out
+        return PossibleAnswers(word_len)
 
     @staticmethod
     def generate_filename(secrets, guesses):
@@ -386,8 +480,8 @@ class WData():
         but we'll immediately see if it is not up-to-date.
         '''
         hashed_items = hashlib.new('sha256')
-        hashed_items.update(str(secrets.words).encode("utf-8"))
-        hashed_items.update(str(guesses.words).encode("utf-8"))
+        hashed_items.update(str(secrets.as_dict()).encode("utf-8"))
+        hashed_items.update(str(guesses.as_dict()).encode("utf-8"))
         hash_str = hashed_items.hexdigest()
         return f"{WData.folder_name}wordle_matrix_{hash_str[:8]}.npy"
 
@@ -410,11 +504,14 @@ class WData():
             matrix = self.generate_the_matrix(secrets, guesses)
 
             # Create a folder if needed
-            if not os.path.exists(WData.folder_name):
-                os.makedirs(WData.folder_name)
-
-            # Save the file for future use
-            np.save(filename, matrix)
+            os.makedirs(WData.folder_name, exist_ok=True)
+
+            # Save the file for future use (via a temporary file, so
+            # other processes never see a half-written one)
+            temp_filename = f"{filename}.{os.getpid()}.tmp"
+            with open(temp_filename, "wb") as matrix_file:
+                np.save(matrix_file, matrix)
+            os.replace(temp_filename, filename)
             print("Done")
 
         return matrix
@@ -439,8 +536,8 @@ class WData():
             data_type = np.int32
 
         matrix = np.zeros((len(secrets), len(guesses)), dtype=data_type)
-        for i, correct_word in secrets.words.items():
-            for j, guess_word in guesses.words.items():
+        for i, correct_word in enumerate(secrets.all_words):
+            for j, guess_word in enumerate(guesses.all_words):
                 answer = get_the_answer(guess_word, correct_word)
                 matrix[i][j] = self.pos_answers[answer]
         return matrix
@@ -525,6 +622,114 @@ def get_the_answer(guess_word, correct_word):
     return tuple(result)
 
 
+def encode_words(words):
+    ''' Encode the list of words as two numpy arrays:
+    letters (as 0-25) in each position: (number of words X word length)
+    and count of each letter in the word: (number of words X 26).
+    Used to filter whole word lists at once.
+    '''
+    word_len = len(words[0]) if words else 0
+    chars = np.array([[ord(letter) - ord("a") for letter in word]
+                      for word in words], dtype=np.uint8)
+    chars = chars.reshape(len(words), word_len)
+
+    counts = np.zeros((len(words), 26), dtype=np.uint8)
+    rows = np.arange(len(words))
+    for position in range(word_len):
+        counts[rows, chars[:, position]] += 1
+
+    return chars, counts
+
+
+def difficulty_mask(chars, counts, guess, answer, difficulty):
+    ''' Vectorized version of WordList.reduce_by_difficulty checks.
+    chars and counts are encoded words (see encode_words).
+    Return boolean array: True for words that are still allowed after
+    the guess (as a word) got the answer (as (2,1,1,1,0)),
+    on HARD (difficulty==1) or ULTRA HARD (difficulty==2) level.
+    '''
+    keep = np.ones(len(chars), dtype=bool)
+
+    # Everything is allowed on NORMAL difficulty level
+    if difficulty == 0:
+        return keep
+
+    guess_chars = [ord(letter) - ord("a") for letter in guess]
+    # Green positions are "replaced with *" by check_green,
+    # so letters are only looked for in the other positions
+    not_green = [position for position, result in enumerate(answer)
+                 if result != 2]
+    yellows = {guess_chars[position] for position, result in enumerate(answer)
+               if result == 1}
+
+    # ULTRA HARD: limit on letter count (see calculate_allowed_letter_count)
+    if difficulty == 2:
+        for letter in set(guess_chars):
+            results = [result for g_letter, result in zip(guess_chars, answer)
+                       if g_letter == letter]
+            if 0 in results and results.count(0) != len(results):
+                allowed_count = len(results) - results.count(0)
+                keep &= counts[:, letter] <= allowed_count
+
+    # Green: green letter is in that place
+    for position, result in enumerate(answer):
+        if result == 2:
+            keep &= chars[:, position] == guess_chars[position]
+
+    # Strict yellow (ULTRA HARD): yellow letter is not in that place
+    if difficulty == 2:
+        for position, result in enumerate(answer):
+            if result == 1:
+                keep &= chars[:, position] != guess_chars[position]
+
+    # Lax yellow: yellow letter is somewhere in the non-green part
+    for letter in yellows:
+        keep &= (chars[:, not_green] == letter).any(axis=1)
+
+    # Grey (ULTRA HARD): grey letter is not in the word, except where
+    # check_yellow_lax has already removed it as a yellow one
+    if difficulty == 2:
+        for position, result in enumerate(answer):
+            if result != 0:
+                continue
+            letter = guess_chars[position]
+            for other in not_green:
+                if letter in yellows and (guess_chars[other] != letter or
+                                          answer[other] != 0):
+                    continue
+                keep &= chars[:, other] != letter
+
+    return keep
+
+
+def verify_difficulty_mask(word_list, runs=100, seed=None):
+    ''' Check that reduce_by_difficulty (difficulty_mask) removes exactly
+    the same words as the check_ functions (words_failing_checks):
+    play runs random games of random guesses on HARD and ULTRA HARD,
+    compare both after every guess.
+    Returns number of guesses checked, raises RuntimeError if different.
+    '''
+    rng = random.Random(seed)
+    checked = 0
+    for _ in range(runs):
+        for difficulty in (1, 2):
+            words = word_list.copy()
+            secret = word_list.n2word(rng.choice(word_list.word_numbers()))
+            for _ in range(6):
+                guess = words.n2word(rng.choice(words.word_numbers()))
+                answer = get_the_answer(guess, secret)
+                expected = set(words.word_numbers().tolist()) - \
+                    set(words.words_failing_checks(guess, answer, difficulty))
+                words.reduce_by_difficulty(guess, answer, difficulty)
+                if set(words.word_numbers().tolist()) != expected:
+                    raise RuntimeError("difficulty_mask doesn't match the checks: " +
+                                       f"{guess} {answer} difficulty {difficulty}")
+                checked += 1
+                if not words or guess == secret:
+                    break
+    return checked
+
+
 def one_game(secrets_original, guesses_original, data,
              difficulty=0, strength=100):
     ''' Playing one game of Wordle.
@@ -556,7 +761,7 @@ def one_game(secrets_original, guesses_original, data,
         guess_n, _ = secrets.find_best_guess(guesses, data, strength=strength)
 
         # Transform it in a word and get the answer from the game
-        guess = guesses.words[guess_n]
+        guess = guesses.n2word(guess_n)
         answer = game.make_move(guess)
 
         # If we answer is all green: we are done
@@ -574,35 +779,171 @@ def one_game(secrets_original, guesses_original, data,
     return game
 
 
-def simulation(options: SimulationOptions):
+def count_answers(remaining, matrix, pair_games, pair_guesses, n_answers,
+                  max_cells=1 << 22):
+    ''' Batched get_distribution: for each pair (game, guess) the number
+    of different answers this guess gets on the remaining secrets
+    of the game. remaining: games x secrets bool array.
+    Pairs are done in chunks of about max_cells (pair, secret) cells.
+    '''
+    # Remaining secrets of each game: secret_ns[starts[n]:starts[n]+counts[n]]
+    games, pair_game_ns = np.unique(pair_games, return_inverse=True)
+    game_ns, secret_ns = np.nonzero(remaining[games])
+    counts = np.bincount(game_ns, minlength=len(games))
+    starts = np.cumsum(counts) - counts
+
+    pair_cells = counts[pair_game_ns]
+    chunk_ends = np.searchsorted(np.cumsum(pair_cells),
+                                 np.arange(max_cells, pair_cells.sum(), max_cells))
+    distributions = np.zeros(len(pair_games), dtype=np.int64)
+    for start, end in zip(np.r_[0, chunk_ends], np.r_[chunk_ends, len(pair_games)]):
+        if start == end:
+            continue
+        cells = pair_cells[start:end]
+        # All (pair, secret) cells of the chunk
+        pair_ns = np.repeat(np.arange(end - start), cells)
+        cell_ns = np.arange(cells.sum()) + \
+            np.repeat(starts[pair_game_ns[start:end]] - np.cumsum(cells) + cells,
+                      cells)
+        codes = matrix[secret_ns[cell_ns], pair_guesses[start:end][pair_ns]]
+        # Each different (pair, answer) is one number
+        keys = pair_ns * n_answers + codes
+        if (end - start) * n_answers <= max_cells:
+            seen = np.zeros((end - start) * n_answers, dtype=bool)
+            seen[keys] = True
+            distributions[start:end] = \
+                seen.reshape(end - start, n_answers).sum(axis=1)
+        else:
+            distributions[start:end] = np.bincount(
+                np.unique(keys) // n_answers, minlength=end - start)
+    return distributions
+
+
+def play_games_batch(secrets, guesses, data, n_games, strength=100, rng=None):
+    ''' Play n_games games of Wordle at once (normal difficulty only),
+    with the same logic as one_game. Remaining secrets of all games
+    are one games x secrets bool array, guesses for all games
+    are picked with batched count_answers, and each turn reduces
+    all of them with one lookup in the matrix.
+    secrets and guesses are full WordLists (as from init_data),
+    rng: numpy random Generator (new one if None). Secrets and random
+    guesses come from it, not from "random", so for the same seed the
+    games are not the ones one_game plays: results agree only
+    statistically (with strength=-1 a game of the same secret is the same)
+    Returns (secret numbers, guess numbers: games x turns, -1 after the
+    game is over, lengths of the games)
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    matrix = data.matrix
+    n_secrets = len(secrets)
+    n_answers = len(data.pos_answers)
+    # Guess number of each secret word
+    secret_guesses = data.secret_guess_ns
+
+    secret_ns = rng.integers(n_secrets, size=n_games)
+    remaining = np.ones((n_games, n_secrets), dtype=bool)
+    lengths = np.zeros(n_games, dtype=np.int64)
+    history = []
+    # Games that are still going
+    active = np.arange(n_games)
+
+    while len(active) > 0:
+        counts = remaining[active].sum(axis=1)
+        # This should not happen if everything works fine
+        if not counts.all():
+            raise RuntimeError("EMPTY SECRETS")
+        turn_guesses = np.full(len(active), -1)
+
+        # One word left: guess it
+        last_word = counts == 1
+        turn_guesses[last_word] = secret_guesses[
+            remaining[active[last_word]].argmax(axis=1)]
+
+        # Few secrets left: is there a secret that splits them all
+        few_words = np.flatnonzero((counts > 1) & (counts < strength))
+        if len(few_words) > 0:
+            pair_ns, pair_secrets = np.nonzero(remaining[active[few_words]])
+            distributions = count_answers(
+                remaining, matrix, active[few_words][pair_ns],
+                secret_guesses[pair_secrets], n_answers)
+            perfect = np.flatnonzero(distributions == counts[few_words][pair_ns])
+            # First perfect secret of each game
+            perfect_games, first = np.unique(pair_ns[perfect], return_index=True)
+            turn_guesses[few_words[perfect_games]] = \
+                secret_guesses[pair_secrets[perfect[first]]]
+
+        # Others: best of strength random guesses
+        to_guess = np.flatnonzero(turn_guesses == -1)
+        if len(to_guess) > 0:
+            if strength == -1 or strength >= len(guesses):
+                candidates = np.tile(np.arange(len(guesses)), (len(to_guess), 1))
+            else:
+                candidates = np.array([rng.choice(len(guesses), strength,
+                                                  replace=False)
+                                       for _ in to_guess])
+            if not history:
+                # First turn: all games have all secrets, so only
+                # different guesses have to be counted (on one game)
+                guess_ns, inverse = np.unique(candidates, return_inverse=True)
+                distributions = count_answers(
+                    remaining, matrix, np.zeros(len(guess_ns), dtype=np.int64),
+                    guess_ns, n_answers)[inverse].reshape(candidates.shape)
+            else:
+                distributions = count_answers(
+                    remaining, matrix,
+                    np.repeat(active[to_guess], candidates.shape[1]),
+                    candidates.ravel(), n_answers).reshape(candidates.shape)
+            turn_guesses[to_guess] = candidates[np.arange(len(to_guess)),
+                                                distributions.argmax(axis=1)]
+
+        # Play the guesses, keep secrets that give the same answers
+        turn_history = np.full(n_games, -1)
+        turn_history[active] = turn_guesses
+        history.append(turn_history)
+        lengths[active] += 1
+        answers = matrix[secret_ns[active], turn_guesses]
+        remaining[active] &= matrix[:, turn_guesses].T == answers[:, None]
+        active = active[secret_guesses[secret_ns[active]] != turn_guesses]
+
+    return secret_ns, np.array(history).T, lengths
+
+
+def simulation(options: SimulationOptions, word_data=None):
     ''' Simulation. Play the games run times
     verbose=True to print out each game
+    word_data: (secrets, guesses, data) from init_data, if already loaded
     Returns win rate, average length of all games
     '''
 
     # Initiate word lists and data
-    secrets, guesses, data = init_data(options.word_length)
+    if word_data is None:
+        word_data = init_data(options.word_length)
+    secrets, guesses, data = word_data
 
     wins = 0
     results = []
-    log = ""
-
-    for _ in range(options.runs):
-        game_result = one_game(secrets, guesses, data,
-                               difficulty=options.difficulty,
-                               strength=options.strength)
-        if options.verbose:
-            print(game_result)
-        if options.logfile_name:
-            log += f"{game_result.to_single_str()}\n"
-
-        if len(game_result) <= 6:
-            wins += 1
-            results.append(len(game_result))
-
+    # Games are written to the log as they are played
+    # (closed even if something goes wrong, so nothing is lost)
     if options.logfile_name:
-        with open(options.logfile_name, "w", encoding="utf-8") as log_fs:
-            log_fs.write(log)
+        log_file = game_log.GameLog(options.logfile_name, guesses.all_words,
+                                    options.binary_log, options.word_length)
+    else:
+        log_file = nullcontext()
+
+    with log_file as log:
+        for _ in range(options.runs):
+            game_result = one_game(secrets, guesses, data,
+                                   difficulty=options.difficulty,
+                                   strength=options.strength)
+            if options.verbose:
+                print(game_result)
+            if log:
+                log.add(game_result.history)
+
+            if len(game_result) <= 6:
+                wins += 1
+                results.append(len(game_result))
 
     # Return win rate, average game length, max length
     win_rate = wins / options.runs
@@ -611,13 +952,128 @@ def simulation(options: SimulationOptions):
     return win_rate, ave_length
 
 
+# Word lists and data of the worker process: only for one word length
+# at a time, as matrices for some lengths are quite large
+worker_data = {"word_length": None, "word_data": None}
+
+def get_worker_data(word_length):
+    ''' init_data for this word length, loaded only if the previous
+    batch of this process was of a different length
+    '''
+    if worker_data["word_length"] != word_length:
+        # Let the old one go before loading the new one
+        worker_data["word_data"] = None
+        worker_data["word_data"] = init_data(word_length)
+        worker_data["word_length"] = word_length
+    return worker_data["word_data"]
+
+def play_batch(job):
+    ''' Worker function: play a batch of games of one grid cell
+    job = (word_length, difficulty, strength, runs, seed)
+    Returns (word_length, difficulty, runs, wins, total length of won games)
+    '''
+    word_length, difficulty, strength, runs, seed = job
+    secrets, guesses, data = get_worker_data(word_length)
+
+    # Normal difficulty: all games of the batch at once
+    # (other games than one_game with the same seed, see play_games_batch)
+    if difficulty == 0:
+        _, _, lengths = play_games_batch(secrets, guesses, data, runs, strength,
+                                         np.random.default_rng(seed))
+        won = lengths <= 6
+        return (word_length, difficulty, runs,
+                int(won.sum()), int(lengths[won].sum()))
+
+    random.seed(seed)
+    wins = 0
+    wins_length = 0
+    for _ in range(runs):
+        game_result = one_game(secrets, guesses, data,
+                               difficulty=difficulty, strength=strength)
+        if len(game_result) <= 6:
+            wins += 1
+            wins_length += len(game_result)
+    return word_length, difficulty, runs, wins, wins_length
+
+def count_words(words_file):
+    ''' Number of words of each length in the file: {length: count}
+    (same words as WordList would take)
+    '''
+    counts = {}
+    with open(words_file, "r", encoding="UTF-8") as words:
+        for line in words:
+            word = line.strip()
+            if "*" not in word:
+                counts[len(word)] = counts.get(len(word), 0) + 1
+    return counts
+
+def get_grid_jobs(options, word_lengths, difficulties,
+                  batch_size=100, seed=None):
+    ''' All batches (see play_batch) for the grid of word lengths and
+    difficulties, options.runs games in each cell.
+    Largest cells first: cost of a game is roughly the size of the
+    matrix (secrets x guesses). Cells of the same word length stay
+    together, so each worker has to load them only once.
+    '''
+    secret_counts = count_words("hello-wordle-secret.txt")
+    guess_counts = count_words("hello-wordle-all.txt")
+    seeds = random.Random(seed)
+
+    jobs = []
+    for word_length in sorted(word_lengths, reverse=True,
+                              key=lambda length: (secret_counts.get(length, 0) *
+                                                  guess_counts.get(length, 0),
+                                                  length)):
+        for difficulty in difficulties:
+            for start in range(0, options.runs, batch_size):
+                runs = min(batch_size, options.runs - start)
+                jobs.append((word_length, difficulty, options.strength,
+                             runs, seeds.randrange(2**32)))
+    return jobs
+
+def grid_simulation(options: SimulationOptions, word_lengths, difficulties,
+                    processes=None, batch_size=100, seed=None):
+    ''' Simulation for all combinations of word lengths and difficulties,
+    options.runs games each (options.strength for the bot, other
+    options are not used). Games are played in batches of batch_size
+    by a pool of processes (all cores if None, no pool if 1).
+    seed: for the same games each time (random if None)
+    Yields (word_length, difficulty, win rate, average length)
+    for each cell, as soon as all its games are done
+    '''
+    jobs = get_grid_jobs(options, word_lengths, difficulties,
+                         batch_size, seed)
+    # Games played, wins and length of won games for each cell
+    cells = {}
+
+    def collect(batches):
+        ''' Add up the batches, yield finished cells
+        '''
+        for word_length, difficulty, runs, wins, wins_length in batches:
+            cell = cells.setdefault((word_length, difficulty), [0, 0, 0])
+            cell[0] += runs
+            cell[1] += wins
+            cell[2] += wins_length
+            if cell[0] == options.runs:
+                played, total_wins, total_length = cells.pop(
+                    (word_length, difficulty))
+                yield (word_length, difficulty, total_wins / played,
+                       total_length / total_wins if total_wins > 0 else 0)
+
+    if processes == 1:
+        yield from collect(map(play_batch, jobs))
+    else:
+        with Pool(processes) as pool:
+            yield from collect(pool.imap_unordered(play_batch, jobs))
+
+
 def find_one_best_opening(secrets, guesses, data):
     ''' Find the best opening word (has largest distribution).
     Also, how large was the distribution and
     was it as big as secrets list?
     '''
     word_n, distribution = secrets.find_best_guess(guesses, data, strength=-1)
-    return guesses.words[word_n], distribution
+    return guesses.n2word(word_n), distribution
 
 
 def find_all_best_openings():
@@ -672,17 +1128,16 @@ def main():
         # logfile_name="hello-wordle-sim-log.txt"
     )
 
-    for options.word_length in range(2, 16):
-
-        for options.difficulty in range(3):
-
-            print(f"Simulation: Word length: {options.word_length}, " +
-                  f"runs: {options.runs}, difficulty: {options.difficulty}, " +
-                  f"Bot strength: {options.strength}")
+    # All word lengths and difficulties, played by a pool of processes
+    # (results are printed as they come, largest word lists first)
+    for word_length, difficulty, win_rate, ave_len in grid_simulation(
+            options, range(2, 16), range(3), processes=None):
 
-            win_rate, ave_len = simulation(options)
-            print(f"Win rate: {win_rate:.1%}, " +
-                  f"AverageLength: {ave_len:.2f}\n")
+        print(f"Simulation: Word length: {word_length}, " +
+              f"runs: {options.runs}, difficulty: {difficulty}, " +
+              f"Bot strength: {options.strength}")
+        print(f"Win rate: {win_rate:.1%}, " +
+              f"AverageLength: {ave_len:.2f}\n")
 
     print(f"Running time: {time.time() - start_time}")
 
@@ -291,8 +291,10 @@ def main():
     new_game_button = find_new_game_button(im, borders)
     
     # Initializing
-    puzzle_words = wordle.WordList("survivle_secret.txt")
-    guessing_words = wordle.WordList("survivle_secret.txt", "survivle_all.txt") 
+    session = wordle.WordleSession(["survivle_secret.txt"],
+                                   ["survivle_secret.txt", "survivle_all.txt"])
+    puzzle_words = session.puzzle_words
+    guessing_words = session.guessing_words
     possible_answers = wordle_tree.generate_all_possible_answers()
     matrix = wordle_tree.get_the_matrix(
         puzzle_words, guessing_words, possible_answers)
@@ -0,0 +1,121 @@
+''' absurdle_solver: answer ranks, tie-breaking and offline challenge games
+'''
+
+import os
+
+import numpy as np
+import pytest
+
+import absurdle_solver
+import wordle
+import wordle_tree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def ranked_answers():
+    return absurdle_solver.sort_possible_answers_by_value(
+        wordle_tree.generate_all_possible_answers())
+
+
+def test_answer_ranks():
+    ranks = ranked_answers()
+    assert sorted(ranks.values()) == list(range(243))
+    assert ranks[(0, 0, 0, 0, 0)] == 0
+    assert ranks[(2, 2, 2, 2, 2)] == 242
+    # More greens win over any number of yellows
+    assert ranks[(1, 1, 1, 1, 0)] < ranks[(2, 0, 0, 0, 0)]
+    # Same letters: yellow on the left is worth more
+    assert ranks[(0, 0, 0, 0, 1)] < ranks[(1, 0, 0, 0, 0)]
+
+
+def test_absurdle_answer_tie_goes_to_lower_rank():
+    # Two remaining words per answer: 3 and 7 tie, 3 is worth less
+    matrix = np.array([[3], [7], [7], [3], [5]], dtype=np.uint8)
+    assert absurdle_solver.absurdle_answer([0, 1, 2, 3, 4], 0,
+                                           ranked_answers(), matrix) == (3, 2)
+    assert absurdle_solver.absurdle_answer([1, 2, 4], 0,
+                                           ranked_answers(), matrix) == (7, 2)
+
+
+def test_absurdle_answers_matches_absurdle_answer(monkeypatch):
+    # Small tiles so that the guesses are split into several of them
+    monkeypatch.setattr(absurdle_solver, "TILE_SIZE", 100)
+    possible_answers = ranked_answers()
+    rng = np.random.default_rng(0)
+    # Few different answers, so there are many ties
+    matrix = rng.integers(0, 6, size=(60, 45), dtype=np.uint8)
+    remaining_words = np.flatnonzero(rng.random(60) < 0.5)
+    guess_list = rng.permutation(45)[:30]
+
+    worst_answers, worst_counts = absurdle_solver.absurdle_answers(
+        remaining_words, guess_list, possible_answers, matrix)
+    for guess, answer, count in zip(guess_list, worst_answers, worst_counts):
+        assert absurdle_solver.absurdle_answer(
+            remaining_words, guess, possible_answers, matrix) == (answer, count)
+
+
+@pytest.fixture(scope="module")
+def small_game(tmp_path_factory):
+    ''' First 100 challenge targets, as puzzle words and guesses
+    '''
+    words_file = tmp_path_factory.mktemp("words") / "words.txt"
+    with open(os.path.join(ROOT, "absurdle-guess.txt"), encoding="utf-8") as fs:
+        words_file.write_text("".join(fs.readlines()[:100]), encoding="utf-8")
+    words = wordle.WordList(str(words_file))
+    possible_answers = ranked_answers()
+    matrix = wordle_tree.generate_the_matrix(words, words, possible_answers)
+    return list(range(len(words))), possible_answers, matrix
+
+
+def test_challenge_games_are_won(small_game):
+    word_ns, possible_answers, matrix = small_game
+    solver = absurdle_solver.ChallengeSolver(word_ns, word_ns, possible_answers,
+                                             matrix, time_limit=5)
+    solutions = {target_n: solver.solve(target_n) for target_n in word_ns[:20]}
+    for target_n, solution in solutions.items():
+        assert solution[-1] == target_n
+        game = absurdle_solver.Absurdle(word_ns, possible_answers, matrix,
+                                        target_n)
+        for guess_n in solution:
+            game.guess(guess_n)
+        assert game.won and not game.lost
+        assert game.guesses == solution
+
+    stats = absurdle_solver.benchmark_challenge(
+        solutions.get, word_ns, possible_answers, matrix, list(solutions))
+    assert stats["games"] == stats["wins"] == 20
+    assert stats["average_length"] == \
+        sum(len(solution) for solution in solutions.values()) / 20
+
+
+def test_challenge_game_lost_when_target_is_dropped(small_game):
+    word_ns, possible_answers, matrix = small_game
+    answer, _ = absurdle_solver.absurdle_answer(word_ns, 0, possible_answers,
+                                                matrix)
+    target_n = next(word_n for word_n in word_ns if matrix[word_n, 0] != answer)
+    game = absurdle_solver.Absurdle(word_ns, possible_answers, matrix, target_n)
+    assert game.guess(0) == answer
+    assert game.lost and not game.won
+    # Game is over, no more guesses
+    assert game.guess(target_n) is None
+    assert game.guesses == [0]
+
+
+def test_challenge_game_lost_when_target_is_guessed_early(small_game):
+    word_ns, possible_answers, matrix = small_game
+    target_n = 5
+    game = absurdle_solver.Absurdle(word_ns, possible_answers, matrix, target_n)
+    # All green is the least likely answer when other words are left
+    assert game.guess(target_n) != game.all_green
+    assert game.lost and not game.won
+    assert target_n not in game.remaining
+
+
+def test_benchmark_counts_lost_games(small_game):
+    word_ns, possible_answers, matrix = small_game
+    stats = absurdle_solver.benchmark_challenge(
+        lambda target_n: [target_n], word_ns, possible_answers, matrix,
+        word_ns[:10])
+    assert stats["games"] == 10 and stats["wins"] == 0
+    assert stats["average_length"] is None
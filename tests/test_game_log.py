@@ -0,0 +1,71 @@
+''' GameLog: writing games and reading them back
+'''
+
+import numpy as np
+import pytest
+
+import game_log
+import hello_wordle_sim
+
+WORDS = ["crane", "slate", "hello", "world"]
+GAMES = [
+    [("crane", (0, 1, 0, 2, 0)), ("hello", (2, 2, 2, 2, 2))],
+    [("world", (2, 2, 2, 2, 2))],
+    [("slate", (0, 0, 1, 0, 0))] * 299 + [("crane", (2, 2, 2, 2, 2))],
+]
+
+
+def test_answer_code_round_trip():
+    pos_answers = hello_wordle_sim.PossibleAnswers(5)
+    for code in range(3**5):
+        answer = pos_answers.decode(code)
+        assert game_log.answer_code(answer) == code == pos_answers[answer]
+        assert game_log.answer_code(code) == code
+        assert game_log.answer_code(np.uint8(code)) == code
+
+
+def test_binary_round_trip(tmp_path):
+    filename = tmp_path / "log.bin"
+    with game_log.GameLog(filename, WORDS, binary=True) as log:
+        for game in GAMES:
+            log.add(game)
+        # Answers as codes (numpy ones too) are the same thing
+        log.add([(word, game_log.answer_code(answer))
+                 for word, answer in GAMES[0]])
+        log.add([(word, np.uint8(game_log.answer_code(answer)))
+                 for word, answer in GAMES[0]])
+    assert list(game_log.read_log(filename, WORDS)) == GAMES + GAMES[:1] * 2
+
+
+def test_text_export(tmp_path):
+    filename = tmp_path / "log.bin"
+    with game_log.GameLog(filename, WORDS, binary=True) as log:
+        for game in GAMES:
+            log.add(game)
+    game_log.export_text(filename, WORDS, tmp_path / "log.txt")
+    lines = (tmp_path / "log.txt").read_text(encoding="utf-8").splitlines()
+    assert lines == [" ".join(word for word, _ in game) for game in GAMES]
+
+
+def test_cut_short_game_is_skipped(tmp_path):
+    filename = tmp_path / "log.bin"
+    with game_log.GameLog(filename, WORDS, binary=True) as log:
+        for game in GAMES:
+            log.add(game)
+    data = filename.read_bytes()
+    filename.write_bytes(data[:-3])
+    assert list(game_log.read_log(filename, WORDS)) == GAMES[:2]
+
+
+def test_wrong_word_list(tmp_path):
+    filename = tmp_path / "log.bin"
+    with game_log.GameLog(filename, WORDS, binary=True) as log:
+        log.add(GAMES[0])
+    with pytest.raises(ValueError):
+        list(game_log.read_log(filename, WORDS[:3]))
+
+
+def test_too_long_game(tmp_path):
+    with game_log.GameLog(tmp_path / "log.bin", WORDS, binary=True) as log:
+        with pytest.raises(ValueError):
+            log.add([("crane", (0, 0, 0, 0, 0))] * 0x10000)
@@ -0,0 +1,121 @@
+''' hello_wordle_sim: batched games, difficulty filters, WordList, best guess
+'''
+
+import os
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import hello_wordle_sim
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALL_WORDS = os.path.join(ROOT, "hello-wordle-all.txt")
+
+
+def make_data(secrets, guesses):
+    ''' WData for small lists, without saving the matrix to a file
+    '''
+    data = SimpleNamespace(pos_answers=hello_wordle_sim.PossibleAnswers(
+        len(secrets.n2word(0))))
+    data.matrix = hello_wordle_sim.WData.generate_the_matrix(data, secrets, guesses)
+    data.secret_guess_ns = np.array([guesses.word2n(word)
+                                     for word in secrets.all_words], dtype=np.int64)
+    return data
+
+
+def test_batch_matches_one_game_when_deterministic():
+    guesses = hello_wordle_sim.WordList(ALL_WORDS, 2)
+    secrets = hello_wordle_sim.WordList(words_list=guesses.all_words[:30],
+                                        words_len=2)
+    data = make_data(secrets, guesses)
+    secret_ns, history, lengths = hello_wordle_sim.play_games_batch(
+        secrets, guesses, data, 30, strength=-1, rng=np.random.default_rng(1))
+
+    for secret_n, game_guesses, length in zip(secret_ns, history, lengths):
+        remaining = secrets.copy()
+        game = hello_wordle_sim.Wordle(secrets.n2word(secret_n))
+        while True:
+            guess_n, _ = remaining.find_best_guess(guesses, data, strength=-1)
+            answer = game.make_move(guesses.n2word(guess_n))
+            if 0 not in answer and 1 not in answer:
+                break
+            remaining.reduce_by_guess(guess_n, data.pos_answers[answer], data)
+        assert len(game) == length
+        assert [word for word, _ in game.history] == \
+            [guesses.n2word(guess_n) for guess_n in game_guesses[:length]]
+
+
+@pytest.mark.parametrize("word_length", [3, 5, 8])
+def test_difficulty_mask_matches_checks(word_length):
+    word_list = hello_wordle_sim.WordList(ALL_WORDS, word_length)
+    assert hello_wordle_sim.verify_difficulty_mask(word_list, runs=20,
+                                                   seed=word_length) > 0
+
+
+@pytest.mark.parametrize("guess, secret", [
+    ("eerie", "there"), ("speed", "abide"), ("lolly", "alloy"),
+    ("sassy", "asses"), ("mamma", "madam")])
+def test_difficulty_mask_repeated_letters(guess, secret):
+    word_list = hello_wordle_sim.WordList(ALL_WORDS, 5)
+    chars, counts = word_list.get_encoded()
+    answer = hello_wordle_sim.get_the_answer(guess, secret)
+    for difficulty in (0, 1, 2):
+        mask = hello_wordle_sim.difficulty_mask(chars, counts, guess,
+                                                answer, difficulty)
+        failing = word_list.words_failing_checks(guess, answer, difficulty)
+        assert set(np.flatnonzero(~mask).tolist()) == set(failing)
+
+
+def test_word_list_keep_only_and_copy():
+    word_list = hello_wordle_sim.WordList(words_list=["abc", "bcd", "cde",
+                                                      "def", "efg", "ab"],
+                                          words_len=3)
+    assert len(word_list) == 5
+    assert word_list.as_dict() == {0: "abc", 1: "bcd", 2: "cde",
+                                   3: "def", 4: "efg"}
+
+    the_copy = word_list.copy()
+    the_copy.keep_only(np.array([True, False, True, False, True]))
+    # Order of the numbers stays, the original is not changed
+    assert the_copy.word_numbers().tolist() == [0, 2, 4]
+    assert len(word_list) == 5
+    assert the_copy.n2word(4) == "efg" and the_copy.word2n("cde") == 2
+
+    random.seed(0)
+    sample = the_copy.sample(2, use_numbers=True)
+    assert len(set(sample)) == 2 and set(sample) <= {0, 2, 4}
+    assert the_copy.sample(10) == ["abc", "cde", "efg"]
+
+
+def test_find_best_guess_endgame():
+    guesses = hello_wordle_sim.WordList(ALL_WORDS, 3)
+    secrets = hello_wordle_sim.WordList(words_list=guesses.all_words[:40],
+                                        words_len=3)
+    data = make_data(secrets, guesses)
+
+    rng = np.random.default_rng(0)
+    checked = 0
+    for _ in range(50):
+        remaining = secrets.copy()
+        remaining.keep_only(rng.random(len(secrets)) < 0.1)
+        # First remaining word that gives a different answer for each of them
+        expected = None
+        for secret_n in remaining.word_numbers().tolist():
+            guess_n = guesses.word2n(secrets.n2word(secret_n))
+            if remaining.get_distribution(guess_n, data) == len(remaining):
+                expected = guess_n
+                break
+        if expected is None or len(remaining) < 2:
+            continue
+        assert remaining.find_best_guess(guesses, data, strength=100) == \
+            (expected, len(remaining))
+        checked += 1
+    assert checked > 0
+
+    # No secrets left: falls through to the random guesses
+    empty = secrets.copy()
+    empty.keep_only(np.zeros(len(secrets), dtype=bool))
+    _, distribution = empty.find_best_guess(guesses, data, strength=5)
+    assert distribution == 0
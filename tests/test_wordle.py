@@ -0,0 +1,37 @@
+''' wordle: Guess coded as one number
+'''
+
+import os
+import random
+
+import pytest
+
+import hello_wordle_sim
+import wordle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("guess_word, correct_word, result, text", [
+    ("speed", "abide", (0, 0, 1, 0, 1), "speed: __Y_Y"),
+    ("eerie", "there", (1, 0, 1, 0, 2), "eerie: Y_Y_G"),
+    ("lolly", "alloy", (1, 1, 2, 0, 2), "lolly: YYG_G"),
+    ("crane", "crane", (2, 2, 2, 2, 2), "crane: GGGGG"),
+])
+def test_guess(guess_word, correct_word, result, text):
+    guess = wordle.Guess(guess_word, correct_word)
+    assert guess.result == result
+    assert guess.code == hello_wordle_sim.PossibleAnswers(5)[result]
+    assert str(guess) == text
+    assert guess.guessed_correctly == (guess_word == correct_word)
+    # Only the word and the code are kept
+    assert not hasattr(guess, "__dict__")
+
+
+def test_guess_matches_hello_wordle_answers():
+    words = wordle.WordList(os.path.join(ROOT, "words-guess.txt")).word_list
+    rng = random.Random(0)
+    for _ in range(2000):
+        guess_word, correct_word = rng.choice(words), rng.choice(words)
+        assert wordle.Guess(guess_word, correct_word).result == \
+            hello_wordle_sim.get_the_answer(guess_word, correct_word)
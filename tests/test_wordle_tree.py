@@ -0,0 +1,56 @@
+''' wordle_tree: trees under HARD and ULTRA HARD rules
+'''
+
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import hello_wordle_sim
+import wordle_tree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def small_tree_data(difficulty, n_secrets=150, n_guesses=400):
+    ''' TreeData for the first secrets of Hello Wordle 5-letter words,
+    guesses are the secrets and some more words after them
+    '''
+    secret_words = hello_wordle_sim.WordList(
+        os.path.join(ROOT, "hello-wordle-secret.txt"), 5).all_words[:n_secrets]
+    other_words = [word for word in hello_wordle_sim.WordList(
+        os.path.join(ROOT, "hello-wordle-all.txt"), 5).all_words
+                   if word not in set(secret_words)]
+    guessing_words = secret_words + other_words[:n_guesses - n_secrets]
+
+    secrets = hello_wordle_sim.WordList(words_list=secret_words)
+    guesses = hello_wordle_sim.WordList(words_list=guessing_words)
+    data = SimpleNamespace(pos_answers=hello_wordle_sim.PossibleAnswers(5))
+    matrix = hello_wordle_sim.WData.generate_the_matrix(data, secrets, guesses)
+    tree_data = wordle_tree.TreeData(matrix, guessing_words,
+                                     np.arange(n_secrets), 5, difficulty)
+    return tree_data, n_secrets
+
+
+@pytest.mark.parametrize("difficulty", [1, 2])
+def test_hard_tree_paths_are_legal(difficulty):
+    tree_data, n_secrets = small_tree_data(difficulty)
+    word_ns = np.arange(n_secrets)
+    guess_words_ns = np.arange(len(tree_data.guessing_words))
+    cost, plan = wordle_tree.add_node(word_ns, guess_words_ns, tree_data, ())
+    paths = wordle_tree.plan_to_paths(word_ns, plan, tree_data)
+
+    # Every secret is found, once
+    assert sorted(path[-1] for path in paths) == list(range(n_secrets))
+    assert sum(len(path) for path in paths) == cost
+
+    for path in paths:
+        secret = tree_data.guessing_words[path[-1]]
+        allowed = hello_wordle_sim.WordList(words_list=tree_data.guessing_words)
+        for guess_n in path:
+            guess = tree_data.guessing_words[guess_n]
+            assert guess_n in allowed.word_numbers()
+            answer = hello_wordle_sim.get_the_answer(guess, secret)
+            allowed.reduce_by_difficulty(guess, answer, difficulty)
+        assert guess == secret
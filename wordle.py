@@ -4,6 +4,42 @@ Strategies: naive; weighted by letters, weighted by positions; re-use green.
 
 import random
 import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import game_log
+import hello_wordle_sim
+
+# Game length (the game will go on, but it will affect the % of wins)
+MAX_TURNS = 6
+
+# Player's settings:
+# With everything off uses the naive greedy method (limit the potential
+# answers and randomly chose a word from the remaining list)
+# "scored": weight words by the frequency of the words
+#   "recount": recalculate weights for every guess
+#   "firstrandom": random first guess
+#       (worse results but more interesting to watch)
+#   "position": use positional letter weights
+# "easymode": don't have to use current result (reuse green space)
+DEFAULT_PARAMS = ["scored", "recount", "firstrandom_off", "position", "easymode"]
+
+# Number of 1 bits in all 13-bit numbers (two of them make a letter set)
+BIT_COUNTS = np.array([bin(n).count("1") for n in range(1 << 13)], dtype=np.uint8)
+
+def letters_to_bits(letters):
+    ''' Set of letters as a bitmask: bit 0 for "a", 1 for "b" etc
+    '''
+    bits = 0
+    for letter in letters:
+        bits |= 1 << (ord(letter) - ord("a"))
+    return bits
+
+def popcount(bits):
+    ''' Number of letters in each letter set bitmask of the array
+    '''
+    return BIT_COUNTS[bits & 0x1FFF] + BIT_COUNTS[bits >> 13]
 
 class WordList:
     ''' Class to load the list of words from file
@@ -11,23 +47,38 @@ class WordList:
     '''
 
     def __init__(self, *files):
-        # list of all the words
-        self.word_list = []
+        # list of all the words (shared by all copies, never changes)
+        self.all_words = []
         for file in files:
             with open(file, "r", encoding="UTF-8") as in_file:
                 for line in in_file:
-                    self.word_list.append(line.strip())
+                    self.all_words.append(line.strip())
+
+        # Index to filter words with masks: letters (0-25) in each position
+        # (words X 5) and count of each letter in the word (words X 26)
+        # Shared by all copies, as all_words
+        self.all_letters, self.all_letter_counts = self.gen_index(self.all_words)
+        # Set of letters of each word, as a bitmask (see letters_to_bits)
+        self.all_letter_sets = (self.all_letter_counts > 0).astype(np.int64) \
+            @ (1 << np.arange(26, dtype=np.int64))
+
+        # Numbers (in all_words) of words that are in this list
+        # Copies and filtering only change this one
+        self.index = np.arange(len(self.all_words))
+        # word_list for the current index (None: not made yet)
+        self.cached_word_list = self.all_words
 
-        # letter counts in all words in the list: {"a": 100, "b": 200, ...}
-        self.letter_count = {}
+        # letter counts in all words in the list: [100, 200, ...] for "a", "b"...
+        self.letter_count = np.zeros(26, dtype=np.int64)
 
-        # words' scores: {"apple": 100, "fruit": 200} etc
-        # score is the sum of all letters' frequencies
-        self.word_scores = {}
+        # words' scores, one per word in all_words (only those
+        # in the list are up to date), score is the sum of all letters' frequencies
+        self.word_scores = np.zeros(len(self.all_words), dtype=np.int64)
 
         # Same, but scores account for letter positions
-        self.position_letter_count = [{}, {}, {}, {}, {}]
-        self.position_word_scores = {}
+        # (position_letter_count is 5 X 26: position, letter)
+        self.position_letter_count = np.zeros((5, 26), dtype=np.int64)
+        self.position_word_scores = np.zeros(len(self.all_words), dtype=np.int64)
 
         # Generate the word scores
         # (both positional and total)
@@ -35,18 +86,63 @@ class WordList:
         self.gen_positional_word_scores()
 
     def copy(self):
-        ''' Copy of existing word list
+        ''' Copy of existing word list. Cheap: all words and scores
+        are shared (scores are replaced, not changed, on recount)
         '''
         new_word_list = WordList()
-        new_word_list.word_list = self.word_list.copy()
-        new_word_list.word_scores = self.word_scores.copy()
-        new_word_list.position_word_scores = self.position_word_scores.copy()
+        new_word_list.all_words = self.all_words
+        new_word_list.all_letters = self.all_letters
+        new_word_list.all_letter_counts = self.all_letter_counts
+        new_word_list.all_letter_sets = self.all_letter_sets
+        new_word_list.index = self.index
+        new_word_list.cached_word_list = self.cached_word_list
+        new_word_list.word_scores = self.word_scores
+        new_word_list.position_word_scores = self.position_word_scores
         return new_word_list
 
+    @staticmethod
+    def gen_index(words):
+        ''' Encode words as arrays: letters in each position
+        and count of each letter
+        '''
+        letters = np.array([[ord(letter) - ord("a") for letter in word]
+                            for word in words], dtype=np.uint8).reshape(-1, 5)
+        letter_counts = np.zeros((len(words), 26), dtype=np.uint8)
+        rows = np.arange(len(words))
+        for i in range(5):
+            letter_counts[rows, letters[:, i]] += 1
+        return letters, letter_counts
+
+    @property
+    def word_list(self):
+        ''' List of words (read only: use filter_by_mask / remove)
+        '''
+        if self.cached_word_list is None:
+            self.cached_word_list = [self.all_words[n] for n in self.index.tolist()]
+        return self.cached_word_list
+
+    @property
+    def letters(self):
+        ''' Letters of the words in the list (words X 5)
+        '''
+        return self.all_letters.take(self.index, axis=0)
+
+    @property
+    def letter_counts(self):
+        ''' Letter counts of the words in the list (words X 26)
+        '''
+        return self.all_letter_counts.take(self.index, axis=0)
+
+    @property
+    def letter_sets(self):
+        ''' Letter sets (bitmasks) of the words in the list
+        '''
+        return self.all_letter_sets[self.index]
+
     def __len__(self):
         ''' Return count of remaining words: len(word_list)
         '''
-        return len(self.word_list)
+        return len(self.index)
 
     def get_random_word(self):
         ''' Return random word from the word list
@@ -58,117 +154,122 @@ class WordList:
         use_position: whether or not use position-based scores
         '''
         scores = self.position_word_scores if use_position else self.word_scores
-        best_word = ""
-        best_score = 0
-        for word in self.word_list:
-            if scores[word] > best_score:
-                best_score = scores[word]
-                best_word = word
-        return best_word
-
-    def get_maximized_word(self, maximized_letters):
+        scores = scores[self.index]
+        # argmax is the first of the highest, the same as going through
+        # the list and keeping the better one (if there is one above 0)
+        if len(scores) == 0 or scores.max() <= 0:
+            return ""
+        return self.word_list[int(scores.argmax())]
+
+    def get_maximized_word(self, maximized_letters, no_mask=None,
+                           allowed_letters=None):
         ''' Return the word with maximized number of unique "letters"
+        Only words that don't have no_mask letters in those places and
+        have no letters other than allowed_letters (if given)
         '''
-        self.gen_letter_count()
-        best_word = ""
-        best_score = 0
-        for word in self.word_list:
-            this_score = 0
-            for letter in maximized_letters:
-                if letter in word:
-                    this_score += 1
-            if this_score > best_score:
-                best_score = this_score
-                best_word = word
-        return best_word
+        letter_sets = self.letter_sets
+        scores = popcount(letter_sets & letters_to_bits(maximized_letters))
+        if allowed_letters is not None:
+            scores[letter_sets & ~letters_to_bits(allowed_letters) != 0] = 0
+        if no_mask is not None:
+            letters = self.letters
+            for n, forbidden_letters in enumerate(no_mask):
+                for forbidden_letter in forbidden_letters:
+                    scores[letters[:, n] == ord(forbidden_letter) - ord("a")] = 0
+        # argmax is the first of the highest, if there is one above 0
+        if len(scores) == 0 or scores.max() == 0:
+            return ""
+        return self.word_list[int(scores.argmax())]
 
     def gen_letter_count(self):
         ''' Calculate counts of all letters in the word_list
         '''
-        self.letter_count = {c:0 for c in "abcdefghijklmnopqrstuvwxyz"}
-        for word in self.word_list:
-            for letter in set(word):
-                self.letter_count[letter] += 1
+        self.letter_count = np.count_nonzero(self.letter_counts, axis=0)
 
     def gen_positional_letter_count(self):
         ''' calculate letter count for each letter position
         '''
-        for i in range(5):
-            self.position_letter_count[i] = \
-                            {c:0 for c in "abcdefghijklmnopqrstuvwxyz"}
-        for word in self.word_list:
-            for i, letter in enumerate(word):
-                self.position_letter_count[i][letter] += 1
+        letters = self.letters
+        self.position_letter_count = np.array(
+            [np.bincount(letters[:, i], minlength=26) for i in range(5)])
 
     def gen_word_scores(self):
         ''' Calculate scores for each word
         '''
         self.gen_letter_count()
-        self.word_scores = {}
-        for word in self.word_list:
-            word_score = 0
-            for letter in set(list(word)):
-                word_score += self.letter_count[letter]
-            self.word_scores[word] = word_score
+        # New array (not changing the old one): copies share them
+        self.word_scores = np.zeros(len(self.all_words), dtype=np.int64)
+        self.word_scores[self.index] = \
+            (self.letter_counts > 0) @ self.letter_count
 
     def gen_positional_word_scores(self):
         ''' Calculate positional scores for each word
         '''
         self.gen_positional_letter_count()
-        self.position_word_scores = {}
-        for word in self.word_list:
-            # Sum up scores, but if the letter is twice in the word
-            # use the highest score only
-            word_score = {}
-            for i, letter in enumerate(word):
-                if letter not in word_score:
-                    word_score[letter] = self.position_letter_count[i][letter]
-                else:
-                    word_score[letter] = max(word_score[letter],
-                                             self.position_letter_count[i][letter])
-            self.position_word_scores[word] = sum(word_score.values())
+        letters = self.letters
+        rows = np.arange(len(letters))
+        # Sum up scores, but if the letter is twice in the word
+        # use the highest score only: keep the best score for each letter
+        letter_scores = np.zeros((len(letters), 26), dtype=np.int64)
+        for i in range(5):
+            letter_scores[rows, letters[:, i]] = np.maximum(
+                letter_scores[rows, letters[:, i]],
+                self.position_letter_count[i][letters[:, i]])
+        # New array (not changing the old one): copies share them
+        self.position_word_scores = np.zeros(len(self.all_words), dtype=np.int64)
+        self.position_word_scores[self.index] = letter_scores.sum(axis=1)
 
     def filter_by_mask(self, yes_mask, no_mask, allowed_mask):
         ''' Removing words from the word list,
         by checking with teh three masks
         '''
-        new_words = []
-        for word in self.word_list:
-            
-            # Yes_mask: should have that letter in that place
-            for n, must_have_letters in enumerate(yes_mask):
-                # use [0]: in YES mask there is no more than 1 item per slot
-                if must_have_letters and word[n] != must_have_letters[0]:
-                    break
-            else:
-                # No_mask: should NOT have that letter in that place
-                fail = False
-                for n, forbidden_letters in enumerate(no_mask):
-                    for forbidden_letter in forbidden_letters:
-                        if word[n] == forbidden_letter:
-                            fail = True
-                    if fail:
-                        break
-                else:
-                    # Allowed mask: should have allowed count of letters
-                    for letter in "abcdefghijklmnopqrstuvwxyz":
-                        count = word.count(letter)
-                        if letter not in allowed_mask[count]:
-                            break
-                    else:
-                        new_words.append(word)
-        self.word_list = new_words
+        letters = self.letters
+        letter_counts = self.letter_counts
+        keep = np.ones(len(self.index), dtype=bool)
+
+        # Yes_mask: should have that letter in that place
+        for n, must_have_letters in enumerate(yes_mask):
+            # use [0]: in YES mask there is no more than 1 item per slot
+            if must_have_letters:
+                keep &= letters[:, n] == ord(must_have_letters[0]) - ord("a")
+
+        # No_mask: should NOT have that letter in that place
+        for n, forbidden_letters in enumerate(no_mask):
+            for forbidden_letter in forbidden_letters:
+                keep &= letters[:, n] != ord(forbidden_letter) - ord("a")
+
+        # Allowed mask: should have allowed count of letters
+        for count, allowed_letters in enumerate(allowed_mask):
+            not_allowed = [n for n, letter in enumerate("abcdefghijklmnopqrstuvwxyz")
+                           if letter not in allowed_letters]
+            if not_allowed:
+                keep &= (letter_counts[:, not_allowed] != count).all(axis=1)
+
+        self.index = self.index[keep]
+        self.cached_word_list = None
+
+    def remove(self, word):
+        ''' Remove the word from the list (if it is there)
+        '''
+        if word in self.word_list:
+            self.index = np.delete(self.index, self.word_list.index(word))
+            self.cached_word_list = None
+
+# Results (letter by letter) of all result codes (see Guess.get_code)
+RESULTS = tuple(map(hello_wordle_sim.PossibleAnswers(5).decode, range(3**5)))
 
 class Guess:
     ''' Class for one guess attempt
-    Contains the guessed word and list of results
+    Contains the guessed word and the result, coded as one number:
+    sum of result[i] * 3**i (see get_code), 242 is all green
+    result is looked up by the code in RESULTS
     '''
 
+    __slots__ = ("word", "code")
+
     def __init__(self, guess_word, correct_word):
         self.word = guess_word
-        # Set to True, but will be switched
-        self.guessed_correctly = False
-        self.result = self.get_result(correct_word)
+        self.code = self.get_code(correct_word)
 
     def __str__(self):
         ''' String representation looks like: ducky: G__Y_
@@ -184,11 +285,24 @@ class Guess:
                 out += "_"
         return out
 
+    @property
+    def result(self):
+        ''' Letter results (tuple):
+        0/1/2 meaning no/misplaced/correct
+        '''
+        return RESULTS[self.code]
 
-    def get_result(self, correct_word):
+    @property
+    def guessed_correctly(self):
+        ''' True if all letters are green
+        '''
+        return self.code == 242
+
+    def get_code(self, correct_word):
         ''' Given the guessed and the right word
         generate the list of letter results:
         0/1/2 meaning no/misplaced/correct
+        Return it coded as one number
         '''
         result = [0, 0, 0, 0, 0]
         # we are using a copy to blank guessed green and yellow
@@ -206,9 +320,8 @@ class Guess:
                     if correct_copy[j] == self.word[i]:
                         correct_copy[j] = ""
                         break
-        if result == [2, 2, 2, 2, 2]:
-            self.guessed_correctly = True
-        return result
+        return result[0] + 3 * result[1] + 9 * result[2] + \
+            27 * result[3] + 81 * result[4]
 
 
 class Wordle:
@@ -218,8 +331,11 @@ class Wordle:
     keeping track of guessed letters
     '''
 
-    def __init__(self, correct_word=None):
-        # the word to guess
+    def __init__(self, correct_word=None, puzzle_words=None):
+        # the word to guess (random one from puzzle_words if it is not there),
+        # default session's list if puzzle_words is None
+        if puzzle_words is None:
+            puzzle_words = get_default_session().puzzle_words
         if correct_word in puzzle_words.word_list:
             self.correct_word = correct_word
         else:
@@ -247,9 +363,15 @@ class Wordle:
 class Player:
     ''' Default player (random)
         Guesses a random word from the whole list
+        Strategy is set by params (DEFAULT_PARAMS if None).
+        Other strategies can subclass it and override make_guess
+        (return the next word to guess), and update (called with
+        the Guess after each turn)
     '''
 
-    def __init__(self, guessing_words):
+    def __init__(self, guessing_words, params=None):
+        # Strategy settings
+        self.params = DEFAULT_PARAMS if params is None else params
         # Mask
         # Yes mask: this letters should be in these places
         self.yes_mask = [[] for _ in range(5)]
@@ -262,7 +384,9 @@ class Player:
         
         # which letter has to be in the word, from green and yellow letters
         self.must_use = set()
-        # copy of the global word set (we'll be removing unfit words from it)
+        # all words the player can guess
+        self.guessing_words = guessing_words
+        # copy of it (we'll be removing unfit words from it)
         self.remaining_words = guessing_words.copy()
 
     def filter_word_list(self):
@@ -285,12 +409,6 @@ class Player:
                     count += 1
             return count
 
-        # Temp Yes mask is empty
-        temp_yes_mask = [[] for _ in range(5)]
-        
-        # Temp No mask is actual Yes mask
-        temp_no_mask = self.yes_mask
-
         # Prioritize those that are present in all "allowed _mask[1]"
         # (meaning they have never been grey) minus all yellow and greens
         greens_n_yellows = set()
@@ -303,19 +421,13 @@ class Player:
         letters_for_allowed_mask = priority_letters
         if count_vowels(priority_letters) == 0:
             letters_for_allowed_mask = set.union(priority_letters, set(list("aoe")))
-            
-        # Temp Allowed mask: priority letters and some vowels
-        # [0] has all letters - any letter can be missed
-        temp_allowed_mask = [set("abcdefghijklmnopqurstuvwxyz")] + [
-            letters_for_allowed_mask for i in range(3)]
 
-        # Find the word to fit temporary mask, with maximized prioritized letters
-        temp_words = guessing_words.copy()
-        temp_words.filter_by_mask(temp_yes_mask, temp_no_mask, temp_allowed_mask)
-        if len(temp_words) > 0:
-            return temp_words.get_maximized_word(list(priority_letters))
-
-        return ""
+        # Find the word with maximized prioritized letters, that has only
+        # priority letters and some vowels, and none of the greens
+        # in their places (no mask is actual Yes mask)
+        return self.guessing_words.get_maximized_word(
+            priority_letters, no_mask=self.yes_mask,
+            allowed_letters=letters_for_allowed_mask)
 
     def make_guess(self):
         ''' Pick the word from the list
@@ -324,16 +436,16 @@ class Player:
         # 1. "scored" is no set
         # 2. "firstrandom" is set and this is the first guess
         # (word list has not been filtered yet)
-        if "scored" not in params or \
-           "firstrandom" in params and \
-           len(self.remaining_words) == len(guessing_words):
+        if "scored" not in self.params or \
+           "firstrandom" in self.params and \
+           len(self.remaining_words) == len(self.guessing_words):
             return self.remaining_words.get_random_word()
 
         # list of masks' lengths
         has_greens = 5 - self.yes_mask.count([])
         # Conditions for "re-use green" logic:
         # has Green; more than 2 potential answers
-        if "easymode" in params and has_greens > 0 \
+        if "easymode" in self.params and has_greens > 0 \
            and len(self.remaining_words) > 2:
             # if reusing green is successful, return that word
             reuse_green_word = self.reuse_green()
@@ -341,12 +453,12 @@ class Player:
                 return reuse_green_word
 
         # recount / don't recount all scores
-        if "recount" in  params:
+        if "recount" in  self.params:
             self.remaining_words.gen_word_scores()
             self.remaining_words.gen_positional_word_scores()
 
         # use / don't use position letter weights
-        if "position" in  params:
+        if "position" in  self.params:
             return self.remaining_words.get_hiscore_word(use_position=True)
         return self.remaining_words.get_hiscore_word(use_position=False)
 
@@ -377,11 +489,12 @@ class Player:
         # count colors for each letter, like this
         # {"a":[2,0], "b":[2,1], "c":[0]}
         letter_count = {}
+        result = guess.result
         for i, letter in enumerate(guess.word):
             if letter in letter_count:
-                letter_count[letter].append(guess.result[i])
+                letter_count[letter].append(result[i])
             else:
-                letter_count[letter] = [guess.result[i]]
+                letter_count[letter] = [result[i]]
 
         # Go through each letter count and update count_mask
         for letter, stats in letter_count.items():
@@ -417,7 +530,8 @@ class Player:
         '''
         # Update allow_mask, knowing letter count of remaining words
         self.remaining_words.gen_letter_count()
-        for letter, count in self.remaining_words.letter_count.items():
+        for letter, count in zip("abcdefghijklmnopqrstuvwxyz",
+                                 self.remaining_words.letter_count):
             # If there is no such words in the whole list
             # remove it from mask
             if count == 0:
@@ -429,117 +543,254 @@ class Player:
         ''' Remove a word from possible guesses
         used to remove used words
         '''
-        if word in self.remaining_words.word_list:
-            self.remaining_words.word_list.remove(word)
-
-def play_one_game(quiet=True, correct_word=None):
-    ''' Playing one round of Wordle using player strategy
-    from PlayerType
-    '''
-    game = Wordle(correct_word)
-    player = Player(guessing_words)
-    done = False
+        self.remaining_words.remove(word)
 
-    # Cycle until we are done
-    while not done:
-
-        # Make a guess
-        players_guess = player.make_guess()
-        
-        # Play the guess, see if we are done
-        if game.guess(players_guess):
-            done = True
-
-        # Post-guess action:
+    def update(self, guess):
+        ''' Post-guess action: update what we know with the Guess
+        '''
         # Remove the words we just played
-        player.remove_word(players_guess)
+        self.remove_word(guess.word)
         # Update mask with guess results
-        player.update_mask_with_guess(game.guesses[-1])
+        self.update_mask_with_guess(guess)
 
         # Filter the word down according to new mask
-        player.filter_word_list()
+        self.filter_word_list()
 
         # Update the mask according to remaining words
-        player.update_mask_with_remaining_words()
+        self.update_mask_with_remaining_words()
+
+class WordleSession:
+    ''' Word lists and settings to play games with.
+    Loads and indexes the lists once, then hands out games and players,
+    (new_game, new_player) that all share them. Can be imported and reused:
+    nothing here depends on globals.
+    puzzle_files: lists for the secret words, guessing_files: for the player
+    '''
 
-    if not quiet:
-        print (game)
-        
-    if game.guesses[-1].guessed_correctly:
-        return game.guesses
-    return -1 # This shouldn't happen
+    def __init__(self, puzzle_files=("words-guess.txt",),
+                 guessing_files=("words-guess.txt", "words-all.txt"),
+                 params=None, max_turns=MAX_TURNS):
+        # List that wordle game uses as a target word
+        self.puzzle_words = WordList(*puzzle_files)
+        # List that the "player" program uses
+        self.guessing_words = WordList(*guessing_files)
+        self.params = DEFAULT_PARAMS if params is None else params
+        self.max_turns = max_turns
+
+    def new_game(self, correct_word=None):
+        ''' New Wordle game (random secret word if None)
+        '''
+        return Wordle(correct_word, self.puzzle_words)
 
+    def new_player(self, params=None):
+        ''' New Player with these params (session's ones if None)
+        '''
+        return Player(self.guessing_words,
+                      self.params if params is None else params)
 
-def parse_results(results):
-    ''' Get couple of main statistics from the list of results
-    '''
-    frequencies = {}
-    lengths = []
-    complete = 0
-    turns_sum = 0
-    for result in results:
-        length = len(result)
-        lengths.append(length)
-        if length in frequencies:
-            frequencies[length] += 1
+    def play_one_game(self, quiet=True, correct_word=None, player=None):
+        ''' Playing one round of Wordle using player strategy
+        from PlayerType (new Player with session's params if None)
+        '''
+        game = self.new_game(correct_word)
+        if player is None:
+            player = self.new_player()
+        done = False
+
+        # Cycle until we are done
+        while not done:
+
+            # Make a guess
+            players_guess = player.make_guess()
+
+            # Play the guess, see if we are done
+            if game.guess(players_guess):
+                done = True
+
+            # Post-guess action
+            player.update(game.guesses[-1])
+
+        if not quiet:
+            print (game)
+
+        if game.guesses[-1].guessed_correctly:
+            return tuple(game.guesses)
+        return -1 # This shouldn't happen
+
+    def parse_results(self, lengths):
+        ''' Get couple of main statistics from the list of games' lengths
+        '''
+        frequencies = {}
+        complete = 0
+        turns_sum = 0
+        for length in lengths:
+            if length in frequencies:
+                frequencies[length] += 1
+            else:
+                frequencies[length] = 1
+            turns_sum += length
+            if length <= self.max_turns:
+                complete += 1
+
+        print (f"Wins: {complete}, Losses: {len(lengths)-complete}")
+        print (f"Winrate: {complete*100/len(lengths):.1f}%")
+
+        if complete > 0:
+            print (f"Average length: {turns_sum/len(lengths):.1f}")
+
+        print (f"Median length: {sorted(lengths)[len(lengths) // 2]}")
+
+    def open_log(self, binary=False):
+        ''' Log file for the results of the simulation (see game_log),
+        games are written there as they are played
+        text format is "guess1 guess2 guess3"
+        final guess is also the secret word
+        '''
+        extension = "bin" if binary else "txt"
+        filename = f"wordle_log_{int(time.time())}.{extension}"
+        return game_log.GameLog(filename, self.guessing_words.word_list, binary)
+
+    def get_jobs(self, number_of_runs, seed=0):
+        ''' Games to play: [(word, seed)] (see play_game_job)
+        if number_of_runs is the size of the list, play all words
+        (from the last one to the first, as they always were), otherwise
+        random ones
+        '''
+        if number_of_runs == len(self.puzzle_words):
+            words_to_solve = self.puzzle_words.word_list[::-1]
         else:
-            frequencies[length] = 1
-        turns_sum += length
-        if length <= MAX_TURNS:
-            complete += 1
+            words_to_solve = [None] * number_of_runs
+        # Seed for each game
+        seeds = random.Random(seed)
+        return [(word, seeds.randrange(2**32)) for word in words_to_solve]
+
+    def simulation(self, number_of_runs, processes=None, seed=0,
+                   binary_log=False):
+        ''' play the game number_of_runs times
+        Games are played by a pool of processes (all cores if None),
+        results are in the same order (and the same) for any number of them
+        Each game goes to the log as soon as it is done (binary_log to
+        write it in the compact binary format)
+        '''
+        print (f"Parameters: {self.params}, Runs: {number_of_runs}")
+        jobs = self.get_jobs(number_of_runs, seed)
+        lengths = []
 
-    print (f"Wins: {complete}, Losses: {len(results)-complete}")
-    print (f"Winrate: {complete*100/len(results):.1f}%")
+        def play_all(games):
+            ''' Log the games as they come, keep only their lengths
+            '''
+            with self.open_log(binary_log) as log:
+                for game in games:
+                    log.add(game)
+                    lengths.append(len(game))
+
+        if processes == 1:
+            init_worker(self)
+            play_all(map(play_game_job, jobs))
+        else:
+            with Pool(processes, initializer=init_worker,
+                      initargs=(self,)) as pool:
+                play_all(pool.imap(play_game_job, jobs, chunksize=16))
 
-    if complete > 0:
-        print (f"Average length: {turns_sum/len(results):.1f}")
+        self.parse_results(lengths)
 
-    print (f"Median length: {sorted(lengths)[len(results) // 2]}")
+    def compare_strategies(self, strategies, number_of_runs, seed=0):
+        ''' Play the same games with each of the strategies:
+        {name: params} or {name: function that makes a new player}.
+        Word lists (and their indexes and scores) are shared by all of them.
+        Return {name: {"win_rate", "average_length", "time_per_game"}}
+        '''
+        jobs = self.get_jobs(number_of_runs, seed)
+        stats = {}
+        for name, strategy in strategies.items():
+            if callable(strategy):
+                make_player = strategy
+            else:
+                make_player = lambda strategy=strategy: self.new_player(strategy)
+            start_time = time.time()
+            lengths = []
+            for word, game_seed in jobs:
+                random.seed(game_seed)
+                lengths.append(len(self.play_one_game(correct_word=word,
+                                                      player=make_player())))
+            wins = sum(1 for length in lengths if length <= self.max_turns)
+            stats[name] = {"win_rate": wins / len(lengths),
+                           "average_length": sum(lengths) / len(lengths),
+                           "time_per_game": (time.time() - start_time) / len(lengths)}
+            print (f"{name}: Winrate: {stats[name]['win_rate']:.1%}, " +
+                   f"Average length: {stats[name]['average_length']:.2f}, " +
+                   f"Time per game: {stats[name]['time_per_game'] * 1000:.1f}ms")
+        return stats
+
+
+# Session with the default lists and settings, for the module-level
+# functions below (made when it is first needed)
+default_session = None
+
+def get_default_session():
+    ''' The default WordleSession (loaded on the first call)
+    '''
+    global default_session
+    if default_session is None:
+        default_session = WordleSession()
+    return default_session
 
+def play_one_game(quiet=True, correct_word=None, player=None):
+    ''' WordleSession.play_one_game with the default session
+    '''
+    return get_default_session().play_one_game(quiet, correct_word, player)
 
-def write_log(results):
-    ''' Write the results of the simulation in the txt file
-    format is "guess1 guess2 guess3"
-    final guess is also the secret word
+def parse_results(lengths):
+    ''' WordleSession.parse_results with the default session
     '''
-    filename = f"wordle_log_{int(time.time())}.txt"
-    with open(filename, "w", encoding="utf-8") as log_file:
-        for result in results:
-            for i, guess in enumerate(result):
-                log_file.write (guess.word)
-                if i != len(result) - 1:
-                    log_file.write(" ")
-                else:
-                    log_file.write("\n")
-
-
-def simulation(number_of_runs):
-    ''' play the game number_of_runs times
-    return the list with all results
+    get_default_session().parse_results(lengths)
+
+def simulation(number_of_runs, processes=None, seed=0, binary_log=False):
+    ''' WordleSession.simulation with the default session
     '''
-    print (f"Parameters: {params}, Runs: {number_of_runs}")
-    simulation_results = []
-    words_to_solve = puzzle_words.word_list.copy()
-
-    for _ in range(number_of_runs):
-        if number_of_runs == 2315:
-            word = words_to_solve.pop()
-            simulation_results.append(play_one_game(correct_word=word))
-        else:
-            simulation_results.append(play_one_game())
+    get_default_session().simulation(number_of_runs, processes, seed, binary_log)
 
-    parse_results(simulation_results)
-    write_log(simulation_results)
+def compare_strategies(strategies, number_of_runs, seed=0):
+    ''' WordleSession.compare_strategies with the default session
+    '''
+    return get_default_session().compare_strategies(strategies, number_of_runs,
+                                                    seed)
+
+
+# Session of the worker process (set by init_worker)
+worker_session = None
+
+def init_worker(session):
+    ''' Set up the worker process: its copy of the session
+    (word lists are sent once per process, not once per game)
+    '''
+    global worker_session
+    worker_session = session
+
+def play_game_job(job):
+    ''' Worker function: play one game from job = (word, seed)
+    word is None for a random one; random is seeded with seed,
+    so the game is the same no matter which process plays it
+    '''
+    word, seed = job
+    random.seed(seed)
+    return tuple((guess.word, guess.code)
+                 for guess in worker_session.play_one_game(correct_word=word))
 
 def main():
     ''' launch the simulation
     '''
     start_time = time.time()
 
-    if N_GAMES == 1:
-        play_one_game(quiet=False)
+    session = WordleSession(PUZZLE_FILES, GUESSING_FILES, PARAMS, MAX_TURNS)
+    print (f"Loading: {time.time()-start_time}")
+
+    if STRATEGIES:
+        session.compare_strategies(STRATEGIES, N_GAMES, SEED)
+    elif N_GAMES == 1:
+        session.play_one_game(quiet=False)
     else:
-        simulation(N_GAMES)
+        session.simulation(N_GAMES, PROCESSES, SEED, BINARY_LOG)
 
     print (f"Time: {time.time()-start_time}")
 
@@ -547,23 +798,13 @@ if __name__ == "__main__":
 
     # Word lists to use:
     # List that wordle game uses as a target word
-    puzzle_words = WordList("words-guess.txt")
+    PUZZLE_FILES = ["words-guess.txt"]
     # List that the "player" program uses
-    guessing_words = WordList("words-guess.txt", "words-all.txt")
-
-    # Game length (the game will go on, but it will affect the % of wins)
-    MAX_TURNS = 6
-
-    # Player's settings:
-    # With everything off uses the naive greedy method (limit the potential
-    # answers and randomly chose a word from the remaining list)
-    # "scored": weight words by the frequency of the words
-    #   "recount": recalculate weights for every guess
-    #   "firstrandom": random first guess
-    #       (worse results but more interesting to watch)
-    #   "position": use positional letter weights
-    # "easymode": don't have to use current result (reuse green space)
-    params = ["scored", "recount", "firstrandom_off", "position", "easymode"]
+    GUESSING_FILES = ["words-guess.txt", "words-all.txt"]
+
+    # Player's settings (a copy of DEFAULT_PARAMS, to change without
+    # changing the defaults of other players)
+    PARAMS = list(DEFAULT_PARAMS)
 
     # Number of games to simulate
     # if == 1, plays one random game, shows how the game went
@@ -571,4 +812,23 @@ if __name__ == "__main__":
     # other numbers - play N_GAMES games with random words from puzzle_words
     N_GAMES = 2315
 
+    # Number of processes to play the games (None: all cores)
+    PROCESSES = None
+    # Random seed for the simulation (the same seed gives the same games)
+    SEED = 0
+    # Write the log in the compact binary format
+    # (game_log.export_text makes a text log out of it)
+    BINARY_LOG = False
+
+    # Strategies to compare on the same N_GAMES games (instead of
+    # the simulation with PARAMS): {name: params}
+    # (or {name: function that makes a new player})
+    STRATEGIES = {}
+    #STRATEGIES = {
+    #    "scored": ["scored"],
+    #    "position": ["scored", "position"],
+    #    "recount": ["scored", "recount", "position"],
+    #    "easymode": PARAMS,
+    #}
+
     main()
@@ -3,14 +3,27 @@ Best tree has average length of 3.4211
 Takes 3-5 hours to complete.
 (Or about an hour if you override the first guess,
 uncomment lines 81-82 for that)
+Trees can also be built for HARD and ULTRA HARD rules
+(see "difficulty" in main()), where guesses allowed in each node
+depend on the guesses and answers on the way to it.
+With "word_length" in main() the tree is built for Hello Wordle
+word lists (hello_wordle_sim) of any length instead.
 '''
 
+import sys
 import time
+import json
 import os.path
 import hashlib
+from collections import Counter
 import numpy as np
 
 import wordle
+import hello_wordle_sim
+
+# Number of matrix cells get_top_guesses takes at once
+# (so the memory it uses doesn't grow with the size of the matrix)
+TILE_SIZE = 1 << 22
 
 def generate_the_matrix(puzzle_words, guessing_words, possible_answers):
     ''' Generate the main matrix of answers: all guessing words X
@@ -34,20 +47,22 @@ def get_filename(puzzle_words, guessing_words, possible_answers):
     return f"wordle_matrix_{hash_str[:8]}.npy"
 
 
-def get_the_matrix(puzzle_words, guessing_words, possible_answers):
+def get_the_matrix(puzzle_words, guessing_words, possible_answers, mmap=False):
     ''' Load the matrix if saved version exists.
     If not, generate, save, return.
     Matrix saved as "wordle_matrix_[last 6 digits of hash].npy"
     Hash is generated from all three inputs
+    mmap=True: memory-map the file (read only) instead of reading it all,
+    for large matrices (full list of guesses)
     '''
     filename = get_filename(puzzle_words, guessing_words, possible_answers)
-    if os.path.exists(filename):
-        matrix = np.load(filename)
-    else:
+    if not os.path.exists(filename):
         print("Generating the cross-check file (takes a couple of minutes)")
         matrix = generate_the_matrix(puzzle_words, guessing_words, possible_answers)
         np.save(filename, matrix)
-    return matrix
+        if not mmap:
+            return matrix
+    return np.load(filename, mmap_mode="r" if mmap else None)
 
 def generate_all_possible_answers():
     ''' Generate all possible answers. and put them om dictionary
@@ -59,19 +74,193 @@ def generate_all_possible_answers():
         out[a_mask] = i
     return out
 
+class TreeStats:
+    ''' Counters and timings of the tree search, by depth
+    (number of guesses made before the node).
+    Shows progress and ETA in stderr, not more often than once in
+    progress_interval seconds (None: don't show).
+    If trace_filename is given, all counters, timings and progress
+    snapshots are saved there as JSON at the end.
+    '''
+
+    # Counters to keep (in this order in the report):
+    # distributions: ones that were scored (not the skipped guesses),
+    # endgame: list was (or wasn't) broken by one of its own words,
+    # filter_cache: allowed guesses mask was (or wasn't) in GuessFilter
+    counter_names = ["nodes", "distributions", "pruned",
+                     "endgame_hits", "endgame_misses",
+                     "filter_cache_hits", "filter_cache_misses"]
+
+    def __init__(self, progress_interval=None, trace_filename=None):
+        self.progress_interval = progress_interval
+        self.trace_filename = trace_filename
+        # {counter name: {depth: count}}
+        self.counters = {name: Counter() for name in self.counter_names}
+        # Time spent in the nodes themselves (not in their children)
+        self.node_time = Counter()
+        # [start time, time spent in children] of the nodes being calculated
+        self.node_stack = []
+        # Part of the tree (0..1) that is done
+        self.done = 0
+        self.start_time = time.perf_counter()
+        self.last_progress = self.start_time
+        self.progress_log = []
+
+    def count(self, name, depth, number=1):
+        ''' Add number to the counter "name" for the depth
+        '''
+        self.counters[name][depth] += number
+
+    def node_started(self, depth):
+        ''' Call when node calculation starts
+        '''
+        self.counters["nodes"][depth] += 1
+        self.node_stack.append([time.perf_counter(), 0])
+
+    def node_finished(self, depth):
+        ''' Call when node calculation ends
+        '''
+        node_start, children_time = self.node_stack.pop()
+        node_time = time.perf_counter() - node_start
+        self.node_time[depth] += node_time - children_time
+        if self.node_stack:
+            self.node_stack[-1][1] += node_time
+
+    def add_done(self, share):
+        ''' Part (share) of the whole tree is calculated.
+        Show progress if it's time
+        '''
+        self.done += share
+        if self.progress_interval is None:
+            return
+        now = time.perf_counter()
+        if now - self.last_progress >= self.progress_interval:
+            self.last_progress = now
+            self.show_progress(now)
+
+    def show_progress(self, now):
+        ''' Print done %, nodes and ETA to stderr
+        '''
+        elapsed = now - self.start_time
+        nodes = sum(self.counters["nodes"].values())
+        eta = elapsed * (1 - self.done) / self.done if self.done > 0 else 0
+        self.progress_log.append({"time": round(elapsed, 1),
+                                  "done": self.done, "nodes": nodes})
+        print(f"{self.done:.2%} done, {nodes} nodes, " +
+              f"elapsed {elapsed:.0f}s, ETA {eta:.0f}s",
+              file=sys.stderr, flush=True)
+
+    def report(self):
+        ''' Print all counters and times, by depth, to stderr
+        '''
+        depths = sorted(self.counters["nodes"])
+        print("depth\t" + "\t".join(self.counter_names) + "\ttime",
+              file=sys.stderr)
+        for depth in depths:
+            counts = "\t".join(str(self.counters[name][depth])
+                               for name in self.counter_names)
+            print(f"{depth}\t{counts}\t{self.node_time[depth]:.1f}",
+                  file=sys.stderr)
+        print(f"Total time: {time.perf_counter() - self.start_time:.1f}",
+              file=sys.stderr)
+
+    def write_trace(self):
+        ''' Save all counters, times and progress to trace_filename (JSON)
+        '''
+        if self.trace_filename is None:
+            return
+        trace = {
+            "elapsed": time.perf_counter() - self.start_time,
+            "by_depth": {
+                depth: dict({name: self.counters[name][depth]
+                             for name in self.counter_names},
+                            time=self.node_time[depth])
+                for depth in sorted(self.counters["nodes"])},
+            "progress": self.progress_log,
+        }
+        with open(self.trace_filename, "w", encoding="utf-8") as fs:
+            json.dump(trace, fs, indent=1)
+
+class TreeData:
+    ''' Everything tree builder needs to know about the word lists:
+    matrix (secrets X guesses), guessing words, numbers of secret
+    words in the guessing list, code of the "all green" answer
+    and filter of allowed guesses for higher difficulties.
+    Also keeps search statistics (TreeStats).
+    '''
+
+    def __init__(self, matrix, guessing_words, secret_guess_ns,
+                 word_length=5, difficulty=0, stats=None):
+        self.matrix = matrix
+        # List of guessing words (str)
+        self.guessing_words = guessing_words
+        # secret_guess_ns[secret_n] is the number of this word in guesses
+        self.secret_guess_ns = np.array(secret_guess_ns)
+        # Answer's number, when the word is guessed (there are 3**word_length)
+        self.all_green = 3**word_length - 1
+        self.guess_filter = None
+        if difficulty != 0:
+            self.guess_filter = GuessFilter(guessing_words, difficulty)
+        self.stats = stats if stats is not None else TreeStats()
+
+class GuessFilter:
+    ''' Guesses allowed on HARD (difficulty==1) and ULTRA HARD (difficulty==2)
+    levels. Each guess and answer played on the way to the node keep
+    only some of guessing words valid, so allowed guesses of the node are
+    its parent's allowed guesses, masked by the last guess and answer.
+    Masks are calculated for all guessing words at once and cached, as
+    the same (guess, answer) appear in many branches of the tree.
+    '''
+
+    def __init__(self, guessing_words, difficulty):
+        self.guessing_words = guessing_words
+        self.difficulty = difficulty
+        self.chars, self.counts = hello_wordle_sim.encode_words(guessing_words)
+        # To turn answer's number back into (0,1,2,0,0)
+        self.pos_answers = hello_wordle_sim.PossibleAnswers(len(guessing_words[0]))
+        # {(guess_n, answer_n): packed mask of allowed guesses}
+        self.masks = {}
+
+    def allowed_mask(self, guess_n, answer_n):
+        ''' Boolean array of all guessing words: True if it is
+        still allowed after guess_n got answer answer_n
+        '''
+        key = (guess_n, answer_n)
+        if key not in self.masks:
+            guess = self.guessing_words[guess_n]
+            answer = self.pos_answers.decode(answer_n)
+            mask = hello_wordle_sim.difficulty_mask(
+                self.chars, self.counts, guess, answer, self.difficulty)
+            # Store packed (8 times smaller) as there can be lots of them
+            self.masks[key] = np.packbits(mask)
+        return np.unpackbits(self.masks[key],
+                             count=len(self.guessing_words)).view(bool)
+
+    def narrow(self, guess_words_ns, guess_n, answer_n):
+        ''' Keep only guesses (array of numbers) that are allowed
+        after guess_n got answer answer_n
+        '''
+        return guess_words_ns[self.allowed_mask(guess_n, answer_n)[guess_words_ns]]
+
+def word_ns_array(word_ns):
+    ''' Numbers of words (list, set etc) as numpy array, to index the matrix
+    '''
+    if isinstance(word_ns, np.ndarray):
+        return word_ns
+    return np.fromiter(word_ns, dtype=np.intp)
+
+def answers_distribution(answers):
+    ''' List of counts of each answer in answers (array), without zeros.
+    Counted by sorting, so it needs as much memory as there are answers,
+    whatever the number of possible answers (3**word_length) is.
+    '''
+    return np.unique(answers, return_counts=True)[1].tolist()
+
 def get_distribution(word_ns, guess_word_n, matrix):
     ''' get list of sizes of resulting wordlist, after splitting
     word_list by guess guess_word
     '''
-    answers = {i:0 for i in range(243)}
-    for n in word_ns:
-        answers[matrix[n][guess_word_n]] += 1
-    # remove zeros
-    non_zero_sizes = []
-    for count in answers.values():
-        if count != 0:
-            non_zero_sizes.append(count)
-    return non_zero_sizes
+    return answers_distribution(matrix[word_ns_array(word_ns), guess_word_n])
 
 def score_distribution(distribution):
     ''' Return a score of distribution
@@ -79,15 +268,26 @@ def score_distribution(distribution):
     '''
     return len(distribution)
 
-def get_top_guesses(word_ns, ignore_ns, guess_words_ns, matrix):
+def get_top_guesses(word_ns, ignore_ns, guess_words_ns, tree_data):
     ''' Return top "tops" distributions with highest scores
     '''
+    word_ns = word_ns_array(word_ns)
+    depth = len(ignore_ns)
+
     # First, can the list be broken by one if the words in it?
+    # (and is it allowed to be played here)
     if len(word_ns)<500:
-        for guess_word in word_ns:
-            distribution = get_distribution(word_ns, guess_word, matrix)
+        secret_guesses = np.intersect1d(tree_data.secret_guess_ns[word_ns],
+                                        guess_words_ns)
+        # Answers for all the words in the list (columns) for these guesses (rows)
+        answers = tree_data.matrix.T[np.ix_(secret_guesses, word_ns)]
+        for guess_word, guess_answers in zip(secret_guesses, answers):
+            tree_data.stats.count("distributions", depth)
+            distribution = answers_distribution(guess_answers)
             if distribution.count(1) == len(distribution):
+                tree_data.stats.count("endgame_hits", depth)
                 return [guess_word]
+        tree_data.stats.count("endgame_misses", depth)
 
     # Override the first guess, use SALET
     #if len(word_ns) == 2315:
@@ -104,118 +304,233 @@ def get_top_guesses(word_ns, ignore_ns, guess_words_ns, matrix):
 
     best_score = [None for _ in range(options)]
     best_n = [None for _ in range(options)]
-    for guess_n in guess_words_ns:
-        if guess_n in ignore_ns:
-            continue
-        distribution = get_distribution(word_ns, guess_n, matrix)
-        score = score_distribution(distribution)
-
-        # Find the best one
-        for i in range(options):
-            if best_n[i] is None or score > best_score[i]:
-                best_score.insert(i, score)
-                best_n.insert(i, guess_n)
-                del best_score[options]
-                del best_n[options]
-                #print (best_n, best_score)
-                break
-
+    scored = 0
+    # Go through guesses in tiles of about TILE_SIZE cells of the matrix
+    tile_width = max(1, TILE_SIZE // len(word_ns))
+    for start in range(0, len(guess_words_ns), tile_width):
+        tile_guesses = guess_words_ns[start:start + tile_width]
+        # Answers for all the words in the list (columns) for the guesses
+        # of the tile (rows), so answers for each guess are in one row
+        answers = tree_data.matrix.T[np.ix_(tile_guesses, word_ns)]
+        for guess_n, guess_answers in zip(tile_guesses, answers):
+            if guess_n in ignore_ns:
+                continue
+            distribution = answers_distribution(guess_answers)
+            # Guess that doesn't split the list gets us nowhere
+            # (can happen on higher difficulties, when few guesses are allowed)
+            if len(distribution) == 1:
+                continue
+            score = score_distribution(distribution)
+            scored += 1
+
+            # Find the best one
+            for i in range(options):
+                if best_n[i] is None or score > best_score[i]:
+                    best_score.insert(i, score)
+                    best_n.insert(i, guess_n)
+                    del best_score[options]
+                    del best_n[options]
+                    #print (best_n, best_score)
+                    break
+
+    tree_data.stats.count("distributions", depth, scored)
+    best_n = [guess_n for guess_n in best_n if guess_n is not None]
+    # Nothing allowed splits the list: any of the remaining words does
+    if not best_n:
+        return [tree_data.secret_guess_ns[word_ns[0]]]
     return best_n
 
 def get_valid_results(word_ns, guess_word_n, matrix):
     ''' Return list of (answer, resulting_list) that are valid for this
     initial list and guess
     '''
-    answers = {i:[] for i in range(243)}
-    for n in word_ns:
-        answers[matrix[n][guess_word_n]].append(n)
-    # remove empty ones
-    out = {}
-    for answer, words in answers.items():
-        if len(words) > 0:
-            out[answer] = words
-    return out
-
-def result_length(result):
-    ''' Len of this result (sum of the 2nd levels lengths)
-    '''
-    count = 0
-    for line in result:
-        count += len(line)
-    return count
-
-def add_node(word_ns, guess_words_ns, matrix, previous_guesses):
+    word_ns = word_ns_array(word_ns)
+    answers = matrix[word_ns, guess_word_n]
+    # Sort words by answers (keeping the order of words with the same answer)
+    # and cut them into groups where the answer changes
+    order = np.argsort(answers, kind="stable")
+    valid_answers, starts = np.unique(answers[order], return_index=True)
+    groups = np.split(word_ns[order], starts[1:])
+    return {int(answer): words for answer, words in zip(valid_answers, groups)}
+
+def add_node(word_ns, guess_words_ns, tree_data, previous_guesses,
+             share=1.0):
     ''' main recursive function
+    tree_data (TreeData) has the matrix and all other word lists' data
+    Return the cost of the best subtree (total number of guesses it takes
+    to get all words in word_ns from here) and its plan:
+    (guess, {answer: plan of the child node}). Paths are restored
+    from the plan by plan_to_paths, only once for the whole tree.
+    share is the part of the whole tree this node is (for the progress)
     '''
 
-    final_result = None
-    print (f"Starting new node for the list of {len(word_ns)}")
-    best_guesses = get_top_guesses(word_ns, previous_guesses, guess_words_ns, matrix)
-    print (f"Best  are: {best_guesses}")
+    stats = tree_data.stats
+    depth = len(previous_guesses)
+    stats.node_started(depth)
+
+    best_cost = None
+    best_plan = None
+    best_guesses = get_top_guesses(word_ns, previous_guesses, guess_words_ns,
+                                   tree_data)
+    # Share of each candidate, and of each word in it
+    guess_share = share / len(best_guesses)
+    word_share = guess_share / len(word_ns)
     for i, best_guess in enumerate(best_guesses):
 
-        out = []
         #print (f"Attempt {i}. Best word is: {best_guess}")
-        answers = get_valid_results(word_ns, best_guess, matrix)
+        answers = get_valid_results(word_ns, best_guess, tree_data.matrix)
+
+        # Lowest possible cost of what is left to calculate: 1 guess for
+        # the guessed word, 2 or more for all others
+        cost = 0
+        cost_left = 2 * len(word_ns) - (tree_data.all_green in answers)
+        children = {}
 
+        guess_done = 0
         for answer, new_list in answers.items():
-            if len(new_list) == 1 or answer == 242:
-                out.append(list(previous_guesses))
+            # No chance to beat the best one: don't look further
+            if best_cost is not None and cost + cost_left >= best_cost:
+                stats.count("pruned", depth)
+                break
 
-                if answer != 242:
-                    out[-1].append(best_guess)
-                out[-1].append(new_list[0])
+            if answer == tree_data.all_green:
+                cost += 1
+                cost_left -= 1
+                stats.add_done(word_share)
+
+            elif len(new_list) == 1:
+                cost += 2
+                cost_left -= 2
+                stats.add_done(word_share)
 
             else:
                 #print (f"After answer {answer} still a list of " +
                 #      f"{len(new_list)}")
-                out += add_node(new_list, guess_words_ns, matrix,
-                                tuple(list(previous_guesses) + [best_guess]))
-
-        if final_result is None or result_length(out) < result_length(final_result):
-            final_result = out
+                new_guess_words_ns = guess_words_ns
+                if tree_data.guess_filter is not None:
+                    stats.count("filter_cache_hits"
+                                if (best_guess, answer) in tree_data.guess_filter.masks
+                                else "filter_cache_misses", depth)
+                    new_guess_words_ns = tree_data.guess_filter.narrow(
+                        guess_words_ns, best_guess, answer)
+                child_cost, children[answer] = add_node(
+                    new_list, new_guess_words_ns, tree_data,
+                    previous_guesses + (best_guess,),
+                    word_share * len(new_list))
+                cost += len(new_list) + child_cost
+                cost_left -= 2 * len(new_list)
+
+            guess_done += len(new_list)
+
+        else:
+            if best_cost is None or cost < best_cost:
+                best_cost = cost
+                best_plan = (best_guess, children)
+
+        # Pruned part of the candidate is done as well
+        stats.add_done(word_share * (len(word_ns) - guess_done))
+
+    stats.node_finished(depth)
+    return best_cost, best_plan
+
+def plan_to_paths(word_ns, plan, tree_data, previous_guesses=()):
+    ''' Restore all guess paths from the plan made by add_node:
+    list of [guess 1, guess 2, ..., secret word]
+    '''
+    out = []
+    best_guess, children = plan
+    answers = get_valid_results(word_ns, best_guess, tree_data.matrix)
+
+    for answer, new_list in answers.items():
+        if answer in children:
+            out += plan_to_paths(new_list, children[answer], tree_data,
+                                 previous_guesses + (best_guess,))
+        else:
+            out.append(list(previous_guesses))
+            if answer != tree_data.all_green:
+                out[-1].append(best_guess)
+            out[-1].append(tree_data.secret_guess_ns[new_list[0]])
 
-    return final_result
+    return out
 
 def result_to_text(result, guessing_words):
     ''' Convert those numbers back to words
+    guessing_words is the list of words (str)
     '''
     out = ""
     for line in result:
-        correct_word = guessing_words.word_list[line[-1]]
+        correct_word = guessing_words[line[-1]]
         for word in line:
-            guess_word = guessing_words.word_list[word]
+            guess_word = guessing_words[word]
             out += guess_word + "\t"
-            guess = wordle.Guess(guess_word, correct_word)
-            guess_txt = "".join(str(c) for c in guess.result)
+            answer = hello_wordle_sim.get_the_answer(guess_word, correct_word)
+            guess_txt = "".join(str(c) for c in answer)
             out += guess_txt + "\t"
         out += "\n"
     return out
 
-
-
-def main():
-    ''' Main method: load words, generate the solution
+def load_wordle_data(difficulty=0):
+    ''' Wordle word lists and the matrix, as TreeData.
+    Secret words are the first words of guessing words.
+    Also return number of secret words.
     '''
-
     puzzle_words = wordle.WordList("words-guess.txt")
     guessing_words = wordle.WordList("words-guess.txt", "words-all.txt")
     possible_answers = generate_all_possible_answers()
     matrix = get_the_matrix(puzzle_words, guessing_words, possible_answers)
+    tree_data = TreeData(matrix, guessing_words.word_list,
+                         np.arange(len(puzzle_words)), 5, difficulty)
+    return tree_data, len(puzzle_words)
+
+def load_hello_wordle_data(word_length, difficulty=0):
+    ''' Hello Wordle word lists of word_length letters and the matrix
+    (from hello_wordle_sim.WData), as TreeData.
+    Also return number of secret words.
+    '''
+    secrets, guesses, data = hello_wordle_sim.init_data(word_length)
+    guessing_words = guesses.all_words
+    tree_data = TreeData(data.matrix, guessing_words, data.secret_guess_ns,
+                         word_length, difficulty)
+    return tree_data, len(secrets)
+
+
+
+def main(difficulty=0, word_length=None,
+         progress_interval=10, trace_filename=None):
+    ''' Main method: load words, generate the solution
+    difficulty: 0 - Normal, 1 - Hard, 2 - Ultra Hard
+    word_length: None for Wordle, or length of Hello Wordle words
+    progress_interval: show progress every N seconds (None: don't)
+    trace_filename: save search statistics there (JSON)
+    '''
+
+    if word_length is None:
+        tree_data, secrets_count = load_wordle_data(difficulty)
+        results_filename = "results.txt"
+    else:
+        tree_data, secrets_count = load_hello_wordle_data(word_length,
+                                                          difficulty)
+        results_filename = f"results_{word_length}.txt"
 
-    guess_words_ns = [n for n in range(len(guessing_words))]
-    word_ns = [n for n in range(len(puzzle_words))]
+    guess_words_ns = np.arange(len(tree_data.guessing_words))
+    word_ns = np.arange(secrets_count)
 
     prev = ()
 
-    result = add_node(word_ns, guess_words_ns, matrix, prev)
+    tree_data.stats = TreeStats(progress_interval, trace_filename)
+    cost, plan = add_node(word_ns, guess_words_ns, tree_data, prev)
+    tree_data.stats.report()
+    tree_data.stats.write_trace()
+    result = plan_to_paths(word_ns, plan, tree_data)
     print (result[:10])
-    with open("results.txt", "w", encoding="utf-8") as fs:
-        fs.write(result_to_text(result, guessing_words))
-    print ("Ave:", result_length(result)/2315)
+    with open(results_filename, "w", encoding="utf-8") as fs:
+        fs.write(result_to_text(result, tree_data.guessing_words))
+    print ("Ave:", cost/secrets_count)
 
 if __name__ == "__main__":
 
     t = time.time()
-    main()
+    # difficulty: 0 - Normal, 1 - Hard, 2 - Ultra Hard (Hello Wordle rules)
+    # word_length: None - Wordle, 2-15 - Hello Wordle words of that length
+    main(difficulty=0, word_length=None)
     print (time.time()-t)